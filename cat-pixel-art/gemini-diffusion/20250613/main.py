@@ -1,74 +1,270 @@
-import time
+import argparse
+import io
 import os
+import shutil
+import sys
+import time
+
+# ANSI control sequences used by TerminalRenderer
+CSI = "\x1b["
+ENTER_ALT_SCREEN = CSI + "?1049h"
+LEAVE_ALT_SCREEN = CSI + "?1049l"
+HIDE_CURSOR = CSI + "?25l"
+SHOW_CURSOR = CSI + "?25h"
+CLEAR = CSI + "2J"
+
+# Unchanged cells between two changed runs are re-sent rather than jumping over them
+# when the gap is no longer than a cursor move would be
+MAX_RUN_GAP = 6
+
+class TerminalRenderer:
+    """Draws frames of text by sending only the cells that changed since the last frame.
+
+    The front buffer holds what the terminal shows and the back buffer the frame being
+    built, one string of cells per row. present() compares the two row by row, moves the
+    cursor to each changed run with an ANSI escape and writes the whole update with a
+    single write. Use it as a context manager to switch to the alternate screen with the
+    cursor hidden, and back again on exit.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.width = 0
+        self.height = 0
+        self.front = []
+        self.back = []
+        self.bytes_written = 0
+
+    def __enter__(self):
+        if os.name == "nt":
+            os.system("")  # Turns on ANSI escape handling in the Windows console
+        self.stream.write(ENTER_ALT_SCREEN + HIDE_CURSOR + CLEAR)
+        self.stream.flush()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stream.write(SHOW_CURSOR + LEAVE_ALT_SCREEN)
+        self.stream.flush()
+
+    def resize(self, width, height):
+        """Resizes both buffers; the next present() repaints every cell."""
+        self.width = width
+        self.height = height
+        self.front = [None] * height
+        self.back = [" " * width] * height
+
+    def draw(self, lines):
+        """Fills the back buffer with lines from the top-left corner, clipped and padded to the screen."""
+        blank = " " * self.width
+        for row in range(self.height):
+            if row < len(lines):
+                self.back[row] = lines[row][: self.width].ljust(self.width)
+            else:
+                self.back[row] = blank
+
+    def present(self):
+        """Writes the cells that differ from the front buffer and swaps the buffers."""
+        out = []
+        if None in self.front:
+            out.append(CLEAR)
+        for row, (new, old) in enumerate(zip(self.back, self.front)):
+            if new == old:
+                continue
+            if old is None:
+                out.append(f"{CSI}{row + 1};1H{new}")
+                continue
+            col = 0
+            while col < self.width:
+                if new[col] == old[col]:
+                    col += 1
+                    continue
+                start = col
+                end = col + 1
+                col += 1
+                while col < self.width and col - end < MAX_RUN_GAP:
+                    if new[col] != old[col]:
+                        end = col + 1
+                    col += 1
+                out.append(f"{CSI}{row + 1};{start + 1}H{new[start:end]}")
+                col = end
+        self.front, self.back = self.back, self.front
+        if out:
+            self.write("".join(out))
+
+    def write(self, frame):
+        """Sends an already built update in one write."""
+        self.bytes_written += len(frame)
+        self.stream.write(frame)
+        self.stream.flush()
+
+class FrameCache:
+    """Updates that take the screen from one car position's frame to the next, built once.
 
-def clear_screen():
-    """Clears the terminal screen."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    The animation is a pure function of the car's position, so one pass of a
+    TerminalRenderer around the whole loop of positions records every update;
+    steady-state frames are then a lookup and a write. Each update assumes the screen
+    shows the previous position's frame, and the cache is only valid for the screen size
+    it was built for.
+    """
+
+    def __init__(self, positions, width, height):
+        self.width = width
+        self.height = height
+        self.updates = {}
+        stream = io.StringIO()
+        renderer = TerminalRenderer(stream)
+        renderer.resize(width, height)
+        # Start from the last frame so the first position gets its update from it
+        renderer.draw(draw_car(positions[-1]).split('\n'))
+        renderer.present()
+        for x in positions:
+            stream.seek(0)
+            stream.truncate()
+            renderer.draw(draw_car(x).split('\n'))
+            renderer.present()
+            self.updates[x] = stream.getvalue()
+
+CAR_ART = [
+    "   _______   ",
+    "  / ______ \\  ",
+    " /  ______  \\ ",
+    "| |      | | |",
+    "| |______| | |",
+    "| |______| | |",
+    "| |______| | |",
+    " \\ \\______ / ",
+    "  \\________/  ",
+]
+# The width of the car art lines
+CAR_WIDTH = len(CAR_ART[0])
 
 def draw_car(x):
     """Draws the pixel art car at a given x position."""
-    car_art = [
-        "   _______   ",
-        "  / ______ \\  ",
-        " /  ______  \\ ",
-        "| |      | | |",
-        "| |______| | |",
-        "| |______| | |",
-        "| |______| | |",
-        " \\ \\______ / ",
-        "  \\________/  ",
-    ]
-
-    # Calculate the width of the car art lines
-    car_width = len(car_art[0])
-
     # Ensure the car doesn't go off the screen horizontally
     screen_width = 80 # Assuming a terminal width of 80 characters for simplicity
     if x < 0:
         output_x = 0  # Padding to the left
         
-    elif x + car_width > screen_width:
-        output_x = screen_width - car_width # Padding to the right
+    elif x + CAR_WIDTH > screen_width:
+        output_x = screen_width - CAR_WIDTH # Padding to the right
     else:
         output_x = x
 
     # Create the output string with padding
     output_lines = []
-    for line in car_art:
+    for line in CAR_ART:
         padded_line = " " * output_x + line
         output_lines.append(padded_line)
 
     return "\n".join(output_lines)
 
-def main():
+def car_positions(speed, screen_width=80):
+    """Returns the positions the car is drawn at in one loop across the screen, in order."""
+    if not 1 <= speed <= screen_width + CAR_WIDTH:
+        raise ValueError(f"speed must be between 1 and {screen_width + CAR_WIDTH}, got {speed}")
+    positions = []
+    car_x = -CAR_WIDTH
+    while car_x <= screen_width:
+        positions.append(car_x)
+        car_x += speed
+    return positions
+
+def benchmark(frames=1000):
+    """Compares the bytes and time per frame of reprinting, diff rendering and cached updates."""
+    loop = car_positions(1)
+    positions = [loop[i % len(loop)] for i in range(frames)]
+
+    start = time.perf_counter()
+    full_bytes = sum(len(CLEAR + draw_car(x) + "\n") for x in positions)
+    full_us = (time.perf_counter() - start) * 1e6 / frames
+
+    renderer = TerminalRenderer(io.StringIO())
+    renderer.resize(80, 24)
+    start = time.perf_counter()
+    for x in positions:
+        renderer.draw(draw_car(x).split('\n'))
+        renderer.present()
+    diff_us = (time.perf_counter() - start) * 1e6 / frames
+
+    start = time.perf_counter()
+    cache = FrameCache(loop, 80, 24)
+    build_ms = (time.perf_counter() - start) * 1000
+    cached = TerminalRenderer(io.StringIO())
+    start = time.perf_counter()
+    for x in positions:
+        cached.write(cache.updates[x])
+    cached_us = (time.perf_counter() - start) * 1e6 / frames
+
+    print(f"{frames} frames on an 80x24 screen")
+    print(f"{'renderer':>10} {'bytes/frame':>12} {'us/frame':>10}")
+    print(f"{'reprint':>10} {full_bytes / frames:>12.0f} {full_us:>10.1f}  (plus one 'clear' process per frame)")
+    print(f"{'diff':>10} {renderer.bytes_written / frames:>12.0f} {diff_us:>10.1f}")
+    print(f"{'cached':>10} {cached.bytes_written / frames:>12.0f} {cached_us:>10.1f}  ({build_ms:.1f} ms to build)")
+
+def main(fps=10, speed=1):
     """Main function to animate the car."""
-    car_x = 0
-    speed = 1  # How many characters the car moves each frame
-    delay = 0.1 # Delay between frames (in seconds)
+    # speed is how many characters the car moves each frame
+    delay = 1 / fps # Delay between frames (in seconds)
+    # The car steps through the cached positions, starting at the left edge of the screen
+    positions = car_positions(speed)
+    index = next((i for i, x in enumerate(positions) if x >= 0), 0)
+    car_x = positions[index]
+    cache = None
+    # CPU time spent on cached frames, and separately on building caches
+    frames = 0
+    cpu_time = 0.0
+    worst_cpu = 0.0
+    builds = 0
+    build_time = 0.0
 
     try:
-        while True:
-            clear_screen()
-            
-            # Draw the car at the current position
-            print(draw_car(car_x))
-            
-            # Move the car
-            car_x += speed
-            
-            # Reset car position to the left if it goes off the right edge
-            # This calculation assumes a fixed screen width (e.g., 80 characters)
-            # For a robust solution, you'd need to get the actual terminal size.
-            screen_width = 80
-            car_width = len(draw_car(0).split('\n')[0]) # Get car width from the first line
-            
-            if car_x > screen_width:
-                car_x = -car_width # Start off-screen again
-
-            time.sleep(delay)
+        with TerminalRenderer() as renderer:
+            next_frame = time.perf_counter()
+            while True:
+                frame_start = time.process_time()
+
+                # Pick up terminal resizes; a new size rebuilds the cache and repaints the whole screen
+                size = shutil.get_terminal_size()
+                if cache is None or (size.columns, size.lines) != (cache.width, cache.height):
+                    cache = FrameCache(positions, size.columns, size.lines)
+                    renderer.resize(size.columns, size.lines)
+                    renderer.draw(draw_car(car_x).split('\n'))
+                    renderer.present()
+                    builds += 1
+                    build_time += time.process_time() - frame_start
+                else:
+                    # Draw the car at the current position
+                    renderer.write(cache.updates[car_x])
+                    frame_cpu = time.process_time() - frame_start
+                    cpu_time += frame_cpu
+                    worst_cpu = max(worst_cpu, frame_cpu)
+                    frames += 1
+
+                # Move the car; past the right edge it starts off-screen on the left again
+                index = (index + 1) % len(positions)
+                car_x = positions[index]
+
+                # Sleep to a fixed schedule so drawing time does not slow the animation,
+                # without racing to catch up after a stall
+                next_frame = max(next_frame + delay, time.perf_counter() - delay)
+                time.sleep(max(0.0, next_frame - time.perf_counter()))
 
     except KeyboardInterrupt:
         print("\nAnimation stopped.")
+    if frames:
+        print(f"CPU per frame over {frames} frames: {cpu_time * 1e6 / frames:.0f} us mean, {worst_cpu * 1e6:.0f} us worst")
+        print(f"Frame cache built {builds} times: {build_time * 1000 / builds:.1f} ms each")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Pixel art car animation")
+    parser.add_argument("--fps", type=float, default=10, help="frames per second")
+    parser.add_argument("--speed", type=int, default=1, help="characters the car moves each frame")
+    parser.add_argument("--bench", action="store_true", help="compare reprinting, diff rendering and cached updates and exit")
+    args = parser.parse_args()
+    if not 1 <= args.speed <= 80 + CAR_WIDTH:
+        parser.error(f"--speed must be between 1 and {80 + CAR_WIDTH}")
+
+    if args.bench:
+        benchmark()
+    else:
+        main(args.fps, args.speed)
@@ -1,14 +1,48 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
 import pygame
 import math
+import mmap
+import os
 import random
+import struct
 import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# Initialize Pygame
-pygame.init()
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Constants
 WIDTH, HEIGHT = 800, 600
 FPS = 60
+# Physics runs at a fixed rate; GRAVITY, FRICTION and speeds are tuned per step at this rate
+PHYSICS_HZ = 60
+SUBSTEPS = 2
+# Most physics steps run in one frame before the backlog is dropped
+MAX_CATCH_UP_STEPS = 5
+# Balls that stay within SLEEP_DISTANCE of one spot for SLEEP_STEPS consecutive steps stop
+# being simulated. A sleeper wakes when a ball approaches it faster than SLEEP_SPEED along
+# the contact normal; slower balls rest on it as if it were fixed.
+SLEEP_DISTANCE = 2.0
+SLEEP_STEPS = 30
+SLEEP_SPEED = 0.5
+# The NumPy backend keeps ball pairs closer than this multiple of their touching distance as
+# candidate contacts, and reuses them until some ball has moved half the margin
+CONTACT_MARGIN = 1.2
+# Frames kept by the profiler for CSV export, and the most recent frames summarised on screen
+PROFILE_FRAMES = 3600
+PROFILE_WINDOW = 120
+# Most balls a trajectory recording holds; every record is padded to this many positions
+RECORD_CAPACITY = 256
+# Seconds skipped by the replay seek keys
+SEEK_SECONDS = 5
 GRAVITY = 0.3
 FRICTION = 0.98
 BOUNCE_DAMPING = 0.8
@@ -27,6 +61,8 @@ GRAY = (128, 128, 128)
 LIGHT_GRAY = (200, 200, 200)
 
 BALL_COLORS = [RED, BLUE, GREEN, YELLOW, PURPLE, ORANGE, CYAN]
+# Transparent key colour for ball sprites; must not be used by any ball
+SPRITE_COLORKEY = (1, 2, 3)
 
 
 class Ball:
@@ -38,22 +74,33 @@ class Ball:
         self.radius = radius
         self.color = random.choice(BALL_COLORS)
         self.mass = radius / 10.0
-
-    def update(self):
+        # Position at the start of the current physics step, for render interpolation
+        self.prev_x = x
+        self.prev_y = y
+        self.asleep = False
+        self.still_steps = 0
+        # Where the ball was when its current run of still steps began
+        self.still_x = x
+        self.still_y = y
+
+    def update(self, dt=1.0, gravity=GRAVITY, friction=FRICTION):
         # Apply gravity
-        self.vy += GRAVITY
+        self.vy += gravity * dt
 
         # Apply friction
-        self.vx *= FRICTION
-        self.vy *= FRICTION
+        friction = friction**dt
+        self.vx *= friction
+        self.vy *= friction
 
         # Update position
-        self.x += self.vx
-        self.y += self.vy
+        self.x += self.vx * dt
+        self.y += self.vy * dt
 
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
-        pygame.draw.circle(screen, BLACK, (int(self.x), int(self.y)), self.radius, 2)
+    def draw(self, screen, alpha=1.0):
+        x = int(self.prev_x + (self.x - self.prev_x) * alpha)
+        y = int(self.prev_y + (self.y - self.prev_y) * alpha)
+        pygame.draw.circle(screen, self.color, (x, y), self.radius)
+        pygame.draw.circle(screen, BLACK, (x, y), self.radius, 2)
 
 
 class Hexagon:
@@ -61,101 +108,130 @@ class Hexagon:
         self.center_x = center_x
         self.center_y = center_y
         self.radius = radius
+        # Radius of the inscribed circle; balls well inside it cannot reach any wall
+        self.inner_radius = radius * math.cos(math.pi / 6)
         self.angle = 0
+        self.prev_angle = 0
         self.rotation_speed = 0
+        self._update_geometry()
 
-    def update(self):
-        self.angle += self.rotation_speed
+    def update(self, dt=1.0):
+        self.angle += self.rotation_speed * dt
+        self._update_geometry()
 
-    def get_vertices(self):
+    def _vertices_at(self, angle):
         vertices = []
         for i in range(6):
-            angle = self.angle + i * math.pi / 3
-            x = self.center_x + self.radius * math.cos(angle)
-            y = self.center_y + self.radius * math.sin(angle)
+            vertex_angle = angle + i * math.pi / 3
+            x = self.center_x + self.radius * math.cos(vertex_angle)
+            y = self.center_y + self.radius * math.sin(vertex_angle)
             vertices.append((x, y))
         return vertices
 
-    def get_edges(self):
-        vertices = self.get_vertices()
+    def _update_geometry(self):
+        """Recompute vertices and per-edge data once for the current angle"""
+        vertices = self._vertices_at(self.angle)
+
         edges = []
+        edge_data = []
         for i in range(6):
             start = vertices[i]
             end = vertices[(i + 1) % 6]
             edges.append((start, end))
-        return edges
-
-    def draw(self, screen):
-        vertices = self.get_vertices()
-        pygame.draw.polygon(screen, LIGHT_GRAY, vertices, 3)
-
-
-def point_to_line_distance(px, py, x1, y1, x2, y2):
-    """Calculate the shortest distance from a point to a line segment"""
-    A = px - x1
-    B = py - y1
-    C = x2 - x1
-    D = y2 - y1
-
-    dot = A * C + B * D
-    len_sq = C * C + D * D
-
-    if len_sq == 0:
-        return math.sqrt(A * A + B * B)
-
-    param = dot / len_sq
-
-    if param < 0:
-        xx = x1
-        yy = y1
-    elif param > 1:
-        xx = x2
-        yy = y2
-    else:
-        xx = x1 + param * C
-        yy = y1 + param * D
 
-    dx = px - xx
-    dy = py - yy
-    return math.sqrt(dx * dx + dy * dy), xx, yy
+            ex = end[0] - start[0]
+            ey = end[1] - start[1]
+            len_sq = ex * ex + ey * ey
+            length = math.sqrt(len_sq)
+            # Unit normal pointing towards the center
+            nx = -ey / length
+            ny = ex / length
+            if (self.center_x - start[0]) * nx + (self.center_y - start[1]) * ny < 0:
+                nx = -nx
+                ny = -ny
+            edge_data.append((start[0], start[1], ex, ey, len_sq, nx, ny))
+
+        self.vertices = vertices
+        self.edges = edges
+        self.edge_data = edge_data
 
+    def get_vertices(self):
+        return self.vertices
 
-def check_ball_wall_collision(ball, hexagon):
-    """Check and resolve collision between ball and hexagon walls"""
-    edges = hexagon.get_edges()
-
-    for edge in edges:
-        (x1, y1), (x2, y2) = edge
-        distance, closest_x, closest_y = point_to_line_distance(ball.x, ball.y, x1, y1, x2, y2)
-
-        if distance < ball.radius:
-            # Calculate normal vector
-            dx = ball.x - closest_x
-            dy = ball.y - closest_y
-            length = math.sqrt(dx * dx + dy * dy)
-
-            if length > 0:
-                # Normalize
-                nx = dx / length
-                ny = dy / length
+    def get_edges(self):
+        return self.edges
 
-                # Move ball out of wall
-                overlap = ball.radius - distance
-                ball.x += nx * overlap
-                ball.y += ny * overlap
+    def draw(self, screen, alpha=1.0):
+        if alpha == 1.0 or self.angle == self.prev_angle:
+            vertices = self.vertices
+        else:
+            vertices = self._vertices_at(self.prev_angle + (self.angle - self.prev_angle) * alpha)
+        pygame.draw.polygon(screen, LIGHT_GRAY, vertices, 3)
 
-                # Reflect velocity
-                dot = ball.vx * nx + ball.vy * ny
-                ball.vx -= 2 * dot * nx
-                ball.vy -= 2 * dot * ny
 
-                # Apply damping
-                ball.vx *= BOUNCE_DAMPING
-                ball.vy *= BOUNCE_DAMPING
+def check_ball_wall_collision(ball, hexagon, bounce_damping=BOUNCE_DAMPING):
+    """Check and resolve collision between ball and hexagon walls, returning the number of walls hit"""
+    # Balls inside the inscribed circle by more than their radius cannot touch a wall
+    limit = hexagon.inner_radius - ball.radius
+    cx = ball.x - hexagon.center_x
+    cy = ball.y - hexagon.center_y
+    if limit > 0 and cx * cx + cy * cy < limit * limit:
+        return 0
+
+    hits = 0
+
+    for x1, y1, ex, ey, len_sq, inward_x, inward_y in hexagon.edge_data:
+        px = ball.x - x1
+        py = ball.y - y1
+
+        # The segment is never closer than its supporting line
+        inside = px * inward_x + py * inward_y
+        if inside >= ball.radius:
+            continue
+
+        if inside <= 0:
+            # The center was pushed past the wall; the closest point would point outwards
+            nx = inward_x
+            ny = inward_y
+            overlap = ball.radius - inside
+        else:
+            param = (px * ex + py * ey) / len_sq
+            if param < 0:
+                param = 0
+            elif param > 1:
+                param = 1
+
+            # Vector from the closest point on the edge to the ball
+            dx = px - param * ex
+            dy = py - param * ey
+            distance = math.sqrt(dx * dx + dy * dy)
+            if distance >= ball.radius:
+                continue
+
+            # Normalize
+            nx = dx / distance
+            ny = dy / distance
+            overlap = ball.radius - distance
+
+        # Move ball out of wall
+        ball.x += nx * overlap
+        ball.y += ny * overlap
+
+        # Reflect velocity
+        dot = ball.vx * nx + ball.vy * ny
+        ball.vx -= 2 * dot * nx
+        ball.vy -= 2 * dot * ny
+
+        # Apply damping
+        ball.vx *= bounce_damping
+        ball.vy *= bounce_damping
+        hits += 1
+
+    return hits
 
 
 def check_ball_ball_collision(ball1, ball2):
-    """Check and resolve collision between two balls"""
+    """Check and resolve collision between two balls, returning whether they touched"""
     dx = ball2.x - ball1.x
     dy = ball2.y - ball1.y
     distance = math.sqrt(dx * dx + dy * dy)
@@ -181,7 +257,7 @@ def check_ball_ball_collision(ball1, ball2):
 
         # Do not resolve if velocities are separating
         if dvn > 0:
-            return
+            return True
 
         # Calculate collision impulse
         impulse = 2 * dvn / (ball1.mass + ball2.mass)
@@ -191,6 +267,764 @@ def check_ball_ball_collision(ball1, ball2):
         ball1.vy += impulse * ball2.mass * ny
         ball2.vx -= impulse * ball1.mass * nx
         ball2.vy -= impulse * ball1.mass * ny
+        return True
+
+    return False
+
+
+def check_ball_static_collision(ball, obstacle, bounce_damping=BOUNCE_DAMPING):
+    """Check and resolve collision between a ball and one that is held in place, bouncing off it like a wall"""
+    dx = ball.x - obstacle.x
+    dy = ball.y - obstacle.y
+    distance = math.sqrt(dx * dx + dy * dy)
+
+    if distance < ball.radius + obstacle.radius and distance > 0:
+        # Normalize collision vector
+        nx = dx / distance
+        ny = dy / distance
+
+        # Move only the free ball out of the obstacle
+        overlap = ball.radius + obstacle.radius - distance
+        ball.x += nx * overlap
+        ball.y += ny * overlap
+
+        # Reflect and damp velocity if moving into the obstacle
+        dot = ball.vx * nx + ball.vy * ny
+        if dot < 0:
+            ball.vx = (ball.vx - 2 * dot * nx) * bounce_damping
+            ball.vy = (ball.vy - 2 * dot * ny) * bounce_damping
+
+
+class SpatialHash:
+    """Uniform grid broadphase that buckets balls by the cell containing their center"""
+
+    # Half of the 8-neighbourhood, so every pair of adjacent cells is visited once
+    NEIGHBOUR_OFFSETS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+    def __init__(self):
+        self.cell_size = 1
+        self.cells = {}
+
+    def rebuild(self, balls):
+        """Re-bucket all balls; the cell size tracks the largest ball diameter"""
+        self.cell_size = 2 * max((ball.radius for ball in balls), default=1)
+        size = self.cell_size
+        cells = {}
+        for ball in balls:
+            key = (int(ball.x // size), int(ball.y // size))
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [ball]
+            else:
+                bucket.append(ball)
+        self.cells = cells
+
+    def candidate_pairs(self):
+        """Yield every pair of balls sharing a cell or sitting in neighbouring cells"""
+        cells = self.cells
+        for (cx, cy), bucket in cells.items():
+            count = len(bucket)
+            for i in range(count):
+                ball1 = bucket[i]
+                for j in range(i + 1, count):
+                    yield ball1, bucket[j]
+
+            for ox, oy in self.NEIGHBOUR_OFFSETS:
+                other = cells.get((cx + ox, cy + oy))
+                if other is None:
+                    continue
+                for ball1 in bucket:
+                    for ball2 in other:
+                        yield ball1, ball2
+
+
+PHASE_EVENTS, PHASE_UPDATE, PHASE_WALLS, PHASE_PAIRS, PHASE_DRAW, PHASE_FLIP = range(6)
+PHASE_NAMES = ("events", "update", "walls", "pairs", "draw", "flip")
+
+
+class PhaseProfiler:
+    """Per-phase frame timer that keeps perf_counter_ns totals in fixed-size ring buffers
+
+    While disabled, lap() is a no-op so the hooks in the hot loop cost one call each.
+    """
+
+    def __init__(self, capacity=PROFILE_FRAMES, window=PROFILE_WINDOW):
+        self.capacity = capacity
+        self.window = window
+        self.samples = None
+        self.frames = 0
+        self.current = [0] * len(PHASE_NAMES)
+        self.last = 0
+        self.enabled = False
+        self.lap = self._lap_disabled
+        self.overlay = None
+        self.overlay_frame = -1
+        self.font = None
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if enabled and self.samples is None:
+            self.samples = [array("q", bytes(8 * self.capacity)) for _ in PHASE_NAMES]
+        self.lap = self._lap if enabled else self._lap_disabled
+        self.last = time.perf_counter_ns()
+
+    def start_frame(self):
+        if self.enabled:
+            self.current = [0] * len(PHASE_NAMES)
+            self.last = time.perf_counter_ns()
+
+    def _lap(self, phase):
+        """Charge the time since the previous lap to phase"""
+        now = time.perf_counter_ns()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def _lap_disabled(self, phase):
+        pass
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        slot = self.frames % self.capacity
+        for samples, elapsed in zip(self.samples, self.current):
+            samples[slot] = elapsed
+        self.frames += 1
+
+    def _recent(self, phase, count):
+        """Return the last count samples of a phase in recording order"""
+        samples = self.samples[phase]
+        count = min(count, self.frames, self.capacity)
+        end = self.frames % self.capacity
+        if end >= count:
+            return samples[end - count : end]
+        return samples[self.capacity - (count - end) :] + samples[:end]
+
+    def stats(self):
+        """Return (name, p50, p95, max) in milliseconds over the rolling window for every phase"""
+        rows = []
+        for phase, name in enumerate(PHASE_NAMES):
+            recent = sorted(self._recent(phase, self.window))
+            if not recent:
+                rows.append((name, 0.0, 0.0, 0.0))
+                continue
+            p50 = recent[len(recent) // 2]
+            p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))]
+            rows.append((name, p50 / 1e6, p95 / 1e6, recent[-1] / 1e6))
+        return rows
+
+    def draw_overlay(self, screen, refresh_frames=15):
+        """Draw the rolling per-phase table, re-rendering it every refresh_frames frames"""
+        if not self.enabled or self.frames == 0:
+            return
+        if self.overlay is None or self.frames - self.overlay_frame >= refresh_frames:
+            if self.font is None:
+                self.font = pygame.font.Font(None, 20)
+            lines = [f"{'phase':<7}{'p50':>7}{'p95':>7}{'max':>7}  ms"]
+            lines += [f"{name:<7}{p50:>7.2f}{p95:>7.2f}{peak:>7.2f}" for name, p50, p95, peak in self.stats()]
+            width = max(self.font.size(line)[0] for line in lines) + 10
+            overlay = pygame.Surface((width, 18 * len(lines) + 8), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, 160))
+            for i, line in enumerate(lines):
+                overlay.blit(self.font.render(line, True, WHITE), (5, 4 + i * 18))
+            self.overlay = overlay
+            self.overlay_frame = self.frames
+        screen.blit(self.overlay, (WIDTH - self.overlay.get_width() - 10, 80))
+
+    def export_csv(self, path):
+        """Write one row per recorded frame still held in the ring buffers"""
+        count = min(self.frames, self.capacity)
+        columns = [self._recent(phase, count) for phase in range(len(PHASE_NAMES))]
+        first_frame = self.frames - count
+        with open(path, "w", newline="") as output:
+            writer = csv.writer(output)
+            writer.writerow(["frame"] + [f"{name}_ns" for name in PHASE_NAMES])
+            for i, row in enumerate(zip(*columns)):
+                writer.writerow([first_frame + i, *row])
+        return count
+
+
+def brute_force_pairs(balls):
+    """Yield every pair of balls"""
+    for i in range(len(balls)):
+        for j in range(i + 1, len(balls)):
+            yield balls[i], balls[j]
+
+
+def step_physics(
+    hexagon,
+    balls,
+    broadphase=None,
+    dt=1.0,
+    gravity=GRAVITY,
+    friction=FRICTION,
+    bounce_damping=BOUNCE_DAMPING,
+    profiler=None,
+):
+    """Advance the hexagon and all balls by dt physics steps and return the number of wall hits"""
+    hexagon.update(dt)
+
+    # Update balls
+    for ball in balls:
+        if not ball.asleep:
+            ball.update(dt, gravity, friction)
+    if profiler is not None:
+        profiler.lap(PHASE_UPDATE)
+
+    # Check collisions
+    wall_hits = 0
+    for ball in balls:
+        if not ball.asleep:
+            wall_hits += check_ball_wall_collision(ball, hexagon, bounce_damping)
+    if profiler is not None:
+        profiler.lap(PHASE_WALLS)
+
+    # Check ball-ball collisions
+    if broadphase is None:
+        pairs = brute_force_pairs(balls)
+    else:
+        broadphase.rebuild(balls)
+        pairs = broadphase.candidate_pairs()
+    for ball1, ball2 in pairs:
+        if not ball1.asleep and not ball2.asleep:
+            check_ball_ball_collision(ball1, ball2)
+        elif ball1.asleep != ball2.asleep:
+            sleeper, mover = (ball1, ball2) if ball1.asleep else (ball2, ball1)
+            dx = sleeper.x - mover.x
+            dy = sleeper.y - mover.y
+            distance = math.sqrt(dx * dx + dy * dy)
+            if distance >= sleeper.radius + mover.radius or distance == 0:
+                continue
+            if (mover.vx * dx + mover.vy * dy) > SLEEP_SPEED * distance:
+                # A ball hitting the sleeper head-on knocks it awake
+                check_ball_ball_collision(ball1, ball2)
+                sleeper.asleep = False
+                sleeper.still_steps = 0
+            else:
+                # Balls grazing or resting on sleepers treat them as fixed
+                check_ball_static_collision(mover, sleeper, bounce_damping)
+    if profiler is not None:
+        profiler.lap(PHASE_PAIRS)
+
+    return wall_hits
+
+
+class BallEngine:
+    """Physics backend that steps each Ball object in pure Python"""
+
+    def __init__(self, gravity=GRAVITY, friction=FRICTION, bounce_damping=BOUNCE_DAMPING, sleeping=True):
+        self.balls = []
+        self.broadphase = SpatialHash()
+        self.gravity = gravity
+        self.friction = friction
+        self.bounce_damping = bounce_damping
+        self.wall_hits = 0
+        self.sleeping = sleeping
+        self.rotation_speed = None
+        self.profiler = None
+
+    def add(self, ball):
+        self.balls.append(ball)
+
+    def save_state(self):
+        for ball in self.balls:
+            ball.prev_x = ball.x
+            ball.prev_y = ball.y
+
+    def step(self, hexagon, dt=1.0):
+        self.wall_hits += step_physics(
+            hexagon,
+            self.balls,
+            self.broadphase,
+            dt,
+            self.gravity,
+            self.friction,
+            self.bounce_damping,
+            self.profiler,
+        )
+
+    def kinetic_energy(self):
+        return sum(0.5 * ball.mass * (ball.vx * ball.vx + ball.vy * ball.vy) for ball in self.balls)
+
+    def update_sleep(self, hexagon):
+        """Wake everything when the rotation changes, otherwise put balls that stayed in place to sleep"""
+        if hexagon.rotation_speed != self.rotation_speed:
+            self.rotation_speed = hexagon.rotation_speed
+            self.wake_all()
+        # Balls resting on a moving wall must keep being simulated
+        if not self.sleeping or hexagon.rotation_speed != 0:
+            return
+
+        # Stillness is judged by displacement, since balls in a pile keep jiggling in place
+        limit = SLEEP_DISTANCE * SLEEP_DISTANCE
+        for ball in self.balls:
+            if ball.asleep:
+                continue
+            dx = ball.x - ball.still_x
+            dy = ball.y - ball.still_y
+            if ball.still_steps and dx * dx + dy * dy < limit:
+                ball.still_steps += 1
+                if ball.still_steps >= SLEEP_STEPS:
+                    ball.asleep = True
+                    ball.vx = 0.0
+                    ball.vy = 0.0
+            else:
+                ball.still_steps = 1
+                ball.still_x = ball.x
+                ball.still_y = ball.y
+
+    def wake_all(self):
+        for ball in self.balls:
+            ball.asleep = False
+            ball.still_steps = 0
+
+    def sleeping_count(self):
+        return sum(1 for ball in self.balls if ball.asleep)
+
+    def sync(self):
+        """Ball objects are the simulation state, so there is nothing to copy back"""
+
+
+class NumpyBallEngine:
+    """Physics backend that keeps ball state in contiguous arrays and steps all balls at once
+
+    Ball objects are kept for rendering only; call sync() before drawing to copy
+    positions and velocities back into them. Ball-ball contacts are split into batches
+    that share no ball; each batch is resolved at once and the batches in sequence, so
+    the result follows the pair-by-pair Python solver. Finding and batching the contacts
+    costs more than resolving them, so the batches are kept across substeps and steps
+    until a ball has moved far enough to reach a pair outside them.
+
+    Every batch still costs a round of NumPy calls, so this backend only overtakes
+    BallEngine with about 1000 or more balls spread over a large hexagon. With the few
+    hundred balls the interactive hexagon holds it is slower.
+    """
+
+    # Multiplier packing a (cell_x, cell_y) pair into one sortable integer key
+    CELL_KEY_STRIDE = 1 << 32
+
+    def __init__(self, gravity=GRAVITY, friction=FRICTION, bounce_damping=BOUNCE_DAMPING, sleeping=True, capacity=64):
+        if np is None:
+            raise RuntimeError("The numpy backend requires numpy to be installed")
+        self.gravity = gravity
+        self.friction = friction
+        self.bounce_damping = bounce_damping
+        self.wall_hits = 0
+        self.sleeping = sleeping
+        self.rotation_speed = None
+        self.profiler = None
+        self.balls = []
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.radius = np.zeros(capacity)
+        self.mass = np.zeros(capacity)
+        self.prev_x = np.zeros(capacity)
+        self.prev_y = np.zeros(capacity)
+        self.asleep = np.zeros(capacity, dtype=bool)
+        self.still_steps = np.zeros(capacity, dtype=np.int64)
+        self.still_x = np.zeros(capacity)
+        self.still_y = np.zeros(capacity)
+        # Candidate contacts as (i, j) batches, the positions they were found at, and the
+        # squared distance any ball may move before they have to be found again
+        self.contact_batches = None
+        self.contact_x = None
+        self.contact_y = None
+        self.contact_limit = 0.0
+        self.contact_rebuilds = 0
+
+    def _grow(self):
+        capacity = 2 * len(self.x)
+        for name in ("x", "y", "vx", "vy", "radius", "mass", "prev_x", "prev_y",
+                     "asleep", "still_steps", "still_x", "still_y"):
+            old = getattr(self, name)
+            array = np.zeros(capacity, dtype=old.dtype)
+            array[: self.count] = old[: self.count]
+            setattr(self, name, array)
+
+    def add(self, ball):
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.x[i] = ball.x
+        self.y[i] = ball.y
+        self.vx[i] = ball.vx
+        self.vy[i] = ball.vy
+        self.radius[i] = ball.radius
+        self.mass[i] = ball.mass
+        self.prev_x[i] = ball.prev_x
+        self.prev_y[i] = ball.prev_y
+        self.asleep[i] = False
+        self.still_steps[i] = 0
+        self.still_x[i] = ball.x
+        self.still_y[i] = ball.y
+        self.count += 1
+        self.balls.append(ball)
+
+    def save_state(self):
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+
+    def step(self, hexagon, dt=1.0):
+        hexagon.update(dt)
+        n = self.count
+        if n == 0:
+            return
+        x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+        radius, mass, asleep = self.radius[:n], self.mass[:n], self.asleep[:n]
+
+        # Apply gravity and friction, then integrate; sleeping balls have zero velocity
+        vy += self.gravity * dt * ~asleep
+        friction = self.friction**dt
+        vx *= friction
+        vy *= friction
+        x += vx * dt
+        y += vy * dt
+
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.lap(PHASE_UPDATE)
+        self._collide_walls(hexagon, x, y, vx, vy, radius, asleep)
+        if profiler is not None:
+            profiler.lap(PHASE_WALLS)
+        self._collide_balls(x, y, vx, vy, radius, mass, asleep)
+        if profiler is not None:
+            profiler.lap(PHASE_PAIRS)
+
+    def _collide_walls(self, hexagon, x, y, vx, vy, radius, asleep):
+        # Only awake balls outside the inscribed-circle early-out need the per-edge test
+        limit = np.maximum(hexagon.inner_radius - radius, 0.0)
+        near = np.flatnonzero(
+            ~asleep & ((x - hexagon.center_x) ** 2 + (y - hexagon.center_y) ** 2 >= limit * limit)
+        )
+        if near.size == 0:
+            return
+        bx, by, bvx, bvy, br = x[near], y[near], vx[near], vy[near], radius[near]
+
+        # Edges are visited in order like check_ball_wall_collision, but for every ball at once
+        for x1, y1, ex, ey, len_sq, inward_x, inward_y in hexagon.edge_data:
+            px = bx - x1
+            py = by - y1
+            inside = px * inward_x + py * inward_y
+            t = np.clip((px * ex + py * ey) / len_sq, 0.0, 1.0)
+            dx = px - t * ex
+            dy = py - t * ey
+            distance = np.hypot(dx, dy)
+
+            # Centers pushed past the wall are moved back along the inward normal
+            beyond = inside <= 0
+            hit = beyond | ((distance < br) & (inside < br))
+            hits = np.count_nonzero(hit)
+            if hits == 0:
+                continue
+            self.wall_hits += hits
+            safe = np.where(hit & ~beyond, distance, 1.0)
+            nx = np.where(beyond, inward_x, dx / safe)
+            ny = np.where(beyond, inward_y, dy / safe)
+
+            # Move balls out of the wall
+            overlap = np.where(hit, np.where(beyond, br - inside, br - distance), 0.0)
+            bx += nx * overlap
+            by += ny * overlap
+
+            # Reflect and damp velocity of the balls that hit
+            dot = bvx * nx + bvy * ny
+            np.copyto(bvx, (bvx - 2 * dot * nx) * self.bounce_damping, where=hit)
+            np.copyto(bvy, (bvy - 2 * dot * ny) * self.bounce_damping, where=hit)
+
+        x[near] = bx
+        y[near] = by
+        vx[near] = bvx
+        vy[near] = bvy
+
+    def _candidate_pairs(self, x, y, radius):
+        """Return index arrays of ball pairs in the same or neighbouring grid cells"""
+        n = len(x)
+        size = 2 * radius.max()
+        cell_x = np.floor(x / size).astype(np.int64)
+        cell_y = np.floor(y / size).astype(np.int64)
+        stride = self.CELL_KEY_STRIDE
+        order = np.argsort(cell_x * stride + cell_y, kind="stable")
+        sorted_keys = (cell_x * stride + cell_y)[order]
+        indices = np.arange(n)
+
+        firsts = []
+        seconds = []
+        for ox, oy in ((0, 0),) + SpatialHash.NEIGHBOUR_OFFSETS:
+            target = (cell_x + ox) * stride + (cell_y + oy)
+            lo = np.searchsorted(sorted_keys, target, side="left")
+            counts = np.searchsorted(sorted_keys, target, side="right") - lo
+            total = counts.sum()
+            if total == 0:
+                continue
+            # Expand every ball's [lo, hi) run of neighbours into flat pair lists
+            first = np.repeat(indices, counts)
+            offsets = np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(total)
+            second = order[offsets]
+            if ox == 0 and oy == 0:
+                keep = first < second
+                first = first[keep]
+                second = second[keep]
+            firsts.append(first)
+            seconds.append(second)
+
+        if not firsts:
+            return indices[:0], indices[:0]
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+    @staticmethod
+    def _contact_batches(i, j, n):
+        """Split contacts into batches in which no ball appears twice, yielding index arrays
+
+        Each batch is built in passes: a pass takes every candidate contact whose priority
+        is the lowest among the candidate contacts of both its balls, then drops the
+        candidates that touch a ball already taken. Passes repeat until no candidate is
+        left, so every batch is a maximal set of ball-disjoint contacts and a ball with k
+        contacts is usually done after about k batches. Priorities are a fixed scramble of
+        the contact order: taking contacts in list order instead lets chains of neighbours
+        each wait for the previous one, which needs many more passes.
+        """
+        count = len(i)
+        priority = (np.arange(count, dtype=np.uint64) * np.uint64(2654435761)) % np.uint64(1 << 32)
+        done = np.zeros(count, dtype=bool)
+        taken = np.zeros(n, dtype=bool)
+        lowest = np.empty(n, dtype=np.uint64)
+        remaining = np.arange(count)
+        while remaining.size:
+            taken.fill(False)
+            picks = []
+            candidates = remaining
+            while candidates.size:
+                ci = i[candidates]
+                cj = j[candidates]
+                cp = priority[candidates]
+                lowest.fill(1 << 32)
+                np.minimum.at(lowest, ci, cp)
+                np.minimum.at(lowest, cj, cp)
+                chosen = (lowest[ci] == cp) & (lowest[cj] == cp)
+                picked = candidates[chosen]
+                picks.append(picked)
+                taken[i[picked]] = True
+                taken[j[picked]] = True
+                candidates = candidates[~chosen]
+                candidates = candidates[~(taken[i[candidates]] | taken[j[candidates]])]
+            batch = np.concatenate(picks)
+            done[batch] = True
+            yield batch
+            remaining = remaining[~done[remaining]]
+
+    def _contacts(self, x, y, radius):
+        """Return the candidate contacts as (i, j) batches, finding them again once a ball moved too far
+
+        Pairs closer than CONTACT_MARGIN times their touching distance are kept. A pair
+        left out was further apart than that, so neither ball can reach the other before
+        one of them has moved half the margin since the contacts were found.
+        """
+        n = len(x)
+        if self.contact_batches is not None and len(self.contact_x) == n:
+            moved = (x - self.contact_x) ** 2 + (y - self.contact_y) ** 2
+            if moved.max() < self.contact_limit:
+                return self.contact_batches
+
+        i, j = self._candidate_pairs(x, y, radius)
+        dx = x[j] - x[i]
+        dy = y[j] - y[i]
+        reach = radius[i] + radius[j]
+        near = dx * dx + dy * dy < (reach * CONTACT_MARGIN) ** 2
+        i = i[near]
+        j = j[near]
+        self.contact_batches = [(i[batch], j[batch]) for batch in self._contact_batches(i, j, n)]
+        self.contact_x = x.copy()
+        self.contact_y = y.copy()
+        self.contact_limit = ((CONTACT_MARGIN - 1) * radius.min()) ** 2
+        self.contact_rebuilds += 1
+        return self.contact_batches
+
+    def _collide_balls(self, x, y, vx, vy, radius, mass, asleep):
+        # Batches are resolved one after another, each from the positions and velocities the
+        # previous batches left, like check_ball_ball_collision run pair by pair
+        for i, j in self._contacts(x, y, radius):
+            self._resolve_batch(x, y, vx, vy, radius, mass, asleep, i, j)
+
+    def _resolve_batch(self, x, y, vx, vy, radius, mass, asleep, i, j):
+        """Resolve contacts that share no ball, so every update can be assigned directly"""
+        dx = x[j] - x[i]
+        dy = y[j] - y[i]
+        distance = np.hypot(dx, dy)
+        # Pairs of sleepers stay where they are
+        hit = (distance < radius[i] + radius[j]) & (distance > 0) & ~(asleep[i] & asleep[j])
+        if not hit.any():
+            return
+        i, j, dx, dy, distance = i[hit], j[hit], dx[hit], dy[hit], distance[hit]
+
+        # Normalize collision vectors
+        nx = dx / distance
+        ny = dy / distance
+        overlap = radius[i] + radius[j] - distance
+
+        # Contacts between an awake ball and a sleeper: balls hitting it head-on wake it,
+        # grazing or resting ones treat it as fixed
+        i_asleep = asleep[i]
+        with_sleeper = i_asleep ^ asleep[j]
+        if with_sleeper.any():
+            mover = np.where(i_asleep, j, i)
+            # Normals point from i to j, so the mover approaches along -n when it is j
+            approach = (vx[mover] * nx + vy[mover] * ny) * np.where(i_asleep, -1.0, 1.0)
+            waking = with_sleeper & (approach > SLEEP_SPEED)
+            sleeper = np.where(i_asleep, i, j)[waking]
+            asleep[sleeper] = False
+            self.still_steps[sleeper] = 0
+
+            fixed = with_sleeper & ~waking
+            if fixed.any():
+                # Normals point from i to j; flip them so they point from the sleeper to the mover
+                sign = np.where(i_asleep[fixed], 1.0, -1.0)
+                self._collide_fixed(x, y, vx, vy, mover[fixed], nx[fixed] * sign, ny[fixed] * sign, overlap[fixed])
+                dynamic = ~fixed
+                i, j, nx, ny, overlap = i[dynamic], j[dynamic], nx[dynamic], ny[dynamic], overlap[dynamic]
+
+        # Separate balls
+        half_overlap = overlap * 0.5
+        x[i] -= nx * half_overlap
+        y[i] -= ny * half_overlap
+        x[j] += nx * half_overlap
+        y[j] += ny * half_overlap
+
+        # Exchange impulses only between balls that are approaching each other
+        dvn = (vx[j] - vx[i]) * nx + (vy[j] - vy[i]) * ny
+        impulse = np.where(dvn > 0, 0.0, 2 * dvn / (mass[i] + mass[j]))
+        vx[i] += impulse * mass[j] * nx
+        vy[i] += impulse * mass[j] * ny
+        vx[j] -= impulse * mass[i] * nx
+        vy[j] -= impulse * mass[i] * ny
+
+    def _collide_fixed(self, x, y, vx, vy, mover, mx, my, overlap):
+        """Push balls out of the sleepers they rest on along (mx, my) and reflect their velocity"""
+        x[mover] += mx * overlap
+        y[mover] += my * overlap
+
+        dot = vx[mover] * mx + vy[mover] * my
+        into = dot < 0
+        mover, dot, mx, my = mover[into], dot[into], mx[into], my[into]
+        # Reflect and damp like a wall bounce
+        damping = self.bounce_damping
+        vx[mover] = (vx[mover] - 2 * dot * mx) * damping
+        vy[mover] = (vy[mover] - 2 * dot * my) * damping
+
+    def kinetic_energy(self):
+        n = self.count
+        return float(0.5 * np.sum(self.mass[:n] * (self.vx[:n] ** 2 + self.vy[:n] ** 2)))
+
+    def update_sleep(self, hexagon):
+        """Wake everything when the rotation changes, otherwise put balls that stayed in place to sleep"""
+        if hexagon.rotation_speed != self.rotation_speed:
+            self.rotation_speed = hexagon.rotation_speed
+            self.wake_all()
+        # Balls resting on a moving wall must keep being simulated
+        if not self.sleeping or hexagon.rotation_speed != 0:
+            return
+
+        # Stillness is judged by displacement, since balls in a pile keep jiggling in place
+        n = self.count
+        x, y, asleep, still_steps = self.x[:n], self.y[:n], self.asleep[:n], self.still_steps[:n]
+        still_x, still_y = self.still_x[:n], self.still_y[:n]
+        near = (x - still_x) ** 2 + (y - still_y) ** 2 < SLEEP_DISTANCE * SLEEP_DISTANCE
+        restart = ~asleep & ~((still_steps > 0) & near)
+        still_steps[:] = np.where(asleep, still_steps, np.where(restart, 1, still_steps + 1))
+        np.copyto(still_x, x, where=restart)
+        np.copyto(still_y, y, where=restart)
+        falling_asleep = ~asleep & (still_steps >= SLEEP_STEPS)
+        asleep |= falling_asleep
+        self.vx[:n][falling_asleep] = 0.0
+        self.vy[:n][falling_asleep] = 0.0
+
+    def wake_all(self):
+        self.asleep[: self.count] = False
+        self.still_steps[: self.count] = 0
+
+    def sleeping_count(self):
+        return int(np.count_nonzero(self.asleep[: self.count]))
+
+    def sync(self):
+        """Copy array state back into the Ball objects used for drawing"""
+        n = self.count
+        for ball, x, y, vx, vy, prev_x, prev_y in zip(
+            self.balls,
+            self.x[:n].tolist(),
+            self.y[:n].tolist(),
+            self.vx[:n].tolist(),
+            self.vy[:n].tolist(),
+            self.prev_x[:n].tolist(),
+            self.prev_y[:n].tolist(),
+        ):
+            ball.x = x
+            ball.y = y
+            ball.vx = vx
+            ball.vy = vy
+            ball.prev_x = prev_x
+            ball.prev_y = prev_y
+
+
+ENGINES = {"python": BallEngine, "numpy": NumpyBallEngine}
+
+
+def advance_physics(engine, hexagon, substeps=SUBSTEPS):
+    """Run one fixed physics step split into equal substeps"""
+    engine.update_sleep(hexagon)
+    engine.save_state()
+    hexagon.prev_angle = hexagon.angle
+    dt = 1.0 / substeps
+    for _ in range(substeps):
+        engine.step(hexagon, dt)
+
+
+class FixedTimestep:
+    """Accumulator that turns variable frame times into a whole number of fixed physics steps"""
+
+    def __init__(self, step_hz=PHYSICS_HZ, max_steps=MAX_CATCH_UP_STEPS):
+        self.step_time = 1.0 / step_hz
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def advance(self, now):
+        """Return how many physics steps are due for the time elapsed since the last call"""
+        if self.last_time is None:
+            self.last_time = now
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        steps = int(self.accumulator // self.step_time)
+        if steps > self.max_steps:
+            # Drop the backlog rather than falling further behind every frame
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step_time
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction of a step elapsed since the newest physics state, used to interpolate drawing"""
+        return min(self.accumulator / self.step_time, 1.0)
+
+
+class CachedText:
+    """Text surface that is only re-rendered when its string changes"""
+
+    def __init__(self, font, color):
+        self.font = font
+        self.color = color
+        self.text = None
+        self.surface = None
+
+    def render(self, text):
+        if text != self.text:
+            self.text = text
+            self.surface = self.font.render(text, True, self.color)
+        return self.surface
 
 
 class Button:
@@ -200,14 +1034,17 @@ class Button:
         self.color = color
         self.font = pygame.font.Font(None, 24)
         self.clicked = False
+        self.text_surface = self.font.render(self.text, True, BLACK)
 
     def draw(self, screen):
-        pygame.draw.rect(screen, self.color, self.rect)
-        pygame.draw.rect(screen, BLACK, self.rect, 2)
+        self.draw_at(screen, self.rect)
+
+    def draw_at(self, surface, rect):
+        pygame.draw.rect(surface, self.color, rect)
+        pygame.draw.rect(surface, BLACK, rect, 2)
 
-        text_surface = self.font.render(self.text, True, BLACK)
-        text_rect = text_surface.get_rect(center=self.rect.center)
-        screen.blit(text_surface, text_rect)
+        text_rect = self.text_surface.get_rect(center=rect.center)
+        surface.blit(self.text_surface, text_rect)
 
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
@@ -221,6 +1058,7 @@ class Slider:
         self.val = initial_val
         self.dragging = False
         self.font = pygame.font.Font(None, 20)
+        self.label = CachedText(self.font, BLACK)
 
     def draw(self, screen):
         # Draw slider track
@@ -234,9 +1072,7 @@ class Slider:
         pygame.draw.rect(screen, BLACK, handle_rect, 2)
 
         # Draw value text
-        text = f"Speed: {self.val:.2f}"
-        text_surface = self.font.render(text, True, BLACK)
-        screen.blit(text_surface, (self.rect.x, self.rect.y - 25))
+        screen.blit(self.label.render(f"Speed: {self.val:.2f}"), (self.rect.x, self.rect.y - 25))
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -251,7 +1087,238 @@ class Slider:
             self.val = self.min_val + (relative_x / self.rect.width) * (self.max_val - self.min_val)
 
 
-def main():
+INSTRUCTIONS = [
+    "Click 'Add Ball' to add more balls",
+    "Use slider to control hexagon rotation",
+    "Watch balls bounce and collide!",
+]
+
+
+class Renderer:
+    """Draws the scene and UI, reusing pre-rasterised sprites and text when caching is enabled"""
+
+    def __init__(self, screen, add_ball_button, speed_slider, cached=True):
+        self.screen = screen
+        self.add_ball_button = add_ball_button
+        self.speed_slider = speed_slider
+        self.cached = cached
+        self.font = pygame.font.Font(None, 36)
+        self.small_font = pygame.font.Font(None, 20)
+        self.ball_count_text = CachedText(self.font, BLACK)
+        self.sleep_count_text = CachedText(self.small_font, BLACK)
+        self.sprites = {}
+        self.static_layer = self._build_static_layer() if cached else []
+
+    def _build_static_layer(self):
+        """Pre-render the UI pieces that never change into (surface, position) pairs"""
+        button = self.add_ball_button
+        button_surface = pygame.Surface(button.rect.size, pygame.SRCALPHA)
+        button.draw_at(button_surface, button_surface.get_rect())
+
+        height = 20 * len(INSTRUCTIONS)
+        width = max(self.small_font.size(instruction)[0] for instruction in INSTRUCTIONS)
+        instructions_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        for i, instruction in enumerate(INSTRUCTIONS):
+            instructions_surface.blit(self.small_font.render(instruction, True, BLACK), (0, i * 20))
+
+        return [(button_surface, button.rect.topleft), (instructions_surface, (20, HEIGHT - 80))]
+
+    def ball_sprite(self, color, radius):
+        """Return the cached sprite for a ball, rasterising it on first use"""
+        key = (color, radius)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            size = 2 * radius + 2
+            sprite = pygame.Surface((size, size)).convert(self.screen)
+            # A run-length encoded colour key blits much faster than per-pixel alpha
+            sprite.fill(SPRITE_COLORKEY)
+            pygame.draw.circle(sprite, color, (radius + 1, radius + 1), radius)
+            pygame.draw.circle(sprite, BLACK, (radius + 1, radius + 1), radius, 2)
+            sprite.set_colorkey(SPRITE_COLORKEY, pygame.RLEACCEL)
+            self.sprites[key] = sprite
+        return sprite
+
+    def draw_balls(self, balls, alpha):
+        if not self.cached:
+            for ball in balls:
+                ball.draw(self.screen, alpha)
+            return
+
+        blits = []
+        for ball in balls:
+            offset = ball.radius + 1
+            x = int(ball.prev_x + (ball.x - ball.prev_x) * alpha) - offset
+            y = int(ball.prev_y + (ball.y - ball.prev_y) * alpha) - offset
+            blits.append((self.ball_sprite(ball.color, ball.radius), (x, y)))
+        self.screen.blits(blits, doreturn=False)
+
+    def draw(self, hexagon, balls, alpha=1.0, sleeping=0):
+        screen = self.screen
+
+        # Draw everything
+        screen.fill(WHITE)
+
+        # Draw hexagon
+        hexagon.draw(screen, alpha)
+
+        # Draw balls
+        self.draw_balls(balls, alpha)
+
+        # Draw UI
+        if self.cached:
+            screen.blits(self.static_layer, doreturn=False)
+            ball_count_text = self.ball_count_text.render(f"Balls: {len(balls)}")
+            sleep_count_text = self.sleep_count_text.render(f"Awake: {len(balls) - sleeping}  Sleeping: {sleeping}")
+        else:
+            self.add_ball_button.draw(screen)
+            for i, instruction in enumerate(INSTRUCTIONS):
+                screen.blit(self.small_font.render(instruction, True, BLACK), (20, HEIGHT - 80 + i * 20))
+            ball_count_text = self.font.render(f"Balls: {len(balls)}", True, BLACK)
+            sleep_count_text = self.small_font.render(
+                f"Awake: {len(balls) - sleeping}  Sleeping: {sleeping}", True, BLACK
+            )
+        self.speed_slider.draw(screen)
+
+        # Draw ball count
+        screen.blit(ball_count_text, (WIDTH - 150, 20))
+        screen.blit(sleep_count_text, (WIDTH - 150, 50))
+
+
+# Trajectory file layout (little-endian): a fixed header, one float32 record per physics
+# step holding [angle, ball count, x0, y0, x1, y1, ...] padded to the capacity, then the
+# spawn table. The record and spawn counts are patched into the header on close.
+TRAJECTORY_MAGIC = b"HXTR"
+TRAJECTORY_VERSION = 1
+TRAJECTORY_HEADER = struct.Struct("<4sIIfIIQfff20x")
+TRAJECTORY_SPAWN = struct.Struct("<If3Bx")
+
+
+class TrajectoryRecorder:
+    """Appends fixed-width per-step records and spawn events to a binary trajectory file"""
+
+    def __init__(self, path, hexagon, capacity=RECORD_CAPACITY, step_hz=PHYSICS_HZ):
+        self.path = path
+        self.hexagon = hexagon
+        self.capacity = capacity
+        self.step_hz = step_hz
+        self.records = 0
+        self.spawns = []
+        self.padding = bytes(8 * capacity)
+        self.warned = False
+        self.file = open(path, "wb")
+        self._write_header(0)
+
+    def _write_header(self, spawn_offset):
+        hexagon = self.hexagon
+        self.file.write(
+            TRAJECTORY_HEADER.pack(
+                TRAJECTORY_MAGIC,
+                TRAJECTORY_VERSION,
+                self.capacity,
+                self.step_hz,
+                self.records,
+                len(self.spawns),
+                spawn_offset,
+                hexagon.center_x,
+                hexagon.center_y,
+                hexagon.radius,
+            )
+        )
+
+    def spawn(self, ball):
+        """Record a ball that first appears in the next step record"""
+        if len(self.spawns) == self.capacity:
+            if not self.warned:
+                print(f"Recording capacity of {self.capacity} balls reached; extra balls are not recorded")
+                self.warned = True
+            return
+        self.spawns.append((self.records, ball.radius, *ball.color))
+
+    def record(self, angle, balls):
+        """Append one step of hexagon angle and ball positions"""
+        count = min(len(balls), len(self.spawns))
+        coords = []
+        for ball in balls[:count]:
+            coords.append(ball.x)
+            coords.append(ball.y)
+        self.file.write(struct.pack(f"<{2 + 2 * count}f", angle, count, *coords))
+        self.file.write(self.padding[8 * count :])
+        self.records += 1
+
+    def close(self):
+        """Write the spawn table and patch the final counts into the header"""
+        spawn_offset = self.file.tell()
+        for spawn in self.spawns:
+            self.file.write(TRAJECTORY_SPAWN.pack(*spawn))
+        self.file.seek(0)
+        self._write_header(spawn_offset)
+        self.file.close()
+
+
+class TrajectoryReplay:
+    """Read-only memory-mapped view of a trajectory file; records are read in place, never loaded"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self.capacity,
+            self.step_hz,
+            self.records,
+            spawn_count,
+            spawn_offset,
+            self.center_x,
+            self.center_y,
+            self.radius,
+        ) = TRAJECTORY_HEADER.unpack_from(self.map)
+        if magic != TRAJECTORY_MAGIC or version != TRAJECTORY_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {TRAJECTORY_VERSION} hexagon trajectory")
+        if self.records == 0:
+            self.close()
+            raise ValueError(f"{path} holds no steps (was the recording closed?)")
+        self.width = 2 + 2 * self.capacity
+        start = TRAJECTORY_HEADER.size
+        self.values = memoryview(self.map)[start : start + 4 * self.width * self.records].cast("f")
+        self.spawns = [
+            TRAJECTORY_SPAWN.unpack_from(self.map, spawn_offset + i * TRAJECTORY_SPAWN.size) for i in range(spawn_count)
+        ]
+
+    def frame(self, index):
+        """Return (angle, ball count, offset of x0 in values) for a step"""
+        base = index * self.width
+        return self.values[base], int(self.values[base + 1]), base + 2
+
+    def close(self):
+        if getattr(self, "values", None) is not None:
+            self.values.release()
+            self.values = None
+        self.map.close()
+        self.file.close()
+
+
+def spawn_ball(engine, spread=100):
+    """Add a new ball at a random position near the center"""
+    x = WIDTH // 2 + random.uniform(-spread, spread)
+    y = HEIGHT // 2 + random.uniform(-spread, spread)
+    ball = Ball(x, y)
+    engine.add(ball)
+    return ball
+
+
+def main(
+    backend="python",
+    substeps=SUBSTEPS,
+    render_cache=True,
+    profile=False,
+    profile_csv="hexagon_profile.csv",
+    record_path=None,
+    record_capacity=RECORD_CAPACITY,
+):
+    # Initialize Pygame
+    pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Bouncing Balls in Rotating Hexagon")
     clock = pygame.time.Clock()
@@ -260,85 +1327,545 @@ def main():
     hexagon = Hexagon(WIDTH // 2, HEIGHT // 2, 200)
 
     # Create initial balls
-    balls = []
+    engine = ENGINES[backend]()
+    balls = engine.balls
     for _ in range(5):
-        x = WIDTH // 2 + random.uniform(-50, 50)
-        y = HEIGHT // 2 + random.uniform(-50, 50)
-        balls.append(Ball(x, y))
+        spawn_ball(engine, spread=50)
+
+    recorder = None
+    if record_path:
+        recorder = TrajectoryRecorder(record_path, hexagon, record_capacity)
+        for ball in balls:
+            recorder.spawn(ball)
 
     # Create UI elements
     add_ball_button = Button(20, 20, 100, 40, "Add Ball")
     speed_slider = Slider(20, 80, 200, 20, -0.05, 0.05, 0)
 
-    font = pygame.font.Font(None, 36)
+    renderer = Renderer(screen, add_ball_button, speed_slider, render_cache)
+    timestep = FixedTimestep()
+
+    # F3 toggles per-phase profiling and its overlay
+    profiler = PhaseProfiler()
+    profiler.set_enabled(profile)
+    engine.profiler = profiler
 
     running = True
     while running:
+        profiler.start_frame()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if add_ball_button.is_clicked(event.pos):
-                    # Add new ball at random position near center
-                    x = WIDTH // 2 + random.uniform(-100, 100)
-                    y = HEIGHT // 2 + random.uniform(-100, 100)
-                    balls.append(Ball(x, y))
+                    ball = spawn_ball(engine)
+                    if recorder is not None:
+                        recorder.spawn(ball)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.set_enabled(not profiler.enabled)
 
             speed_slider.handle_event(event)
+        profiler.lap(PHASE_EVENTS)
 
-        # Update hexagon rotation
+        # Update hexagon rotation and physics
         hexagon.rotation_speed = speed_slider.val
-        hexagon.update()
-
-        # Update balls
-        for ball in balls:
-            ball.update()
-
-        # Check collisions
-        for ball in balls:
-            check_ball_wall_collision(ball, hexagon)
+        for _ in range(timestep.advance(time.perf_counter())):
+            advance_physics(engine, hexagon, substeps)
+            if recorder is not None:
+                engine.sync()
+                recorder.record(hexagon.angle, balls)
+        engine.sync()
+        alpha = timestep.alpha
+        profiler.lap(PHASE_UPDATE)
+
+        renderer.draw(hexagon, balls, alpha, engine.sleeping_count())
+        profiler.draw_overlay(screen)
+        profiler.lap(PHASE_DRAW)
+        pygame.display.flip()
+        profiler.lap(PHASE_FLIP)
+        profiler.end_frame()
+        clock.tick(FPS)
 
-        # Check ball-ball collisions
-        for i in range(len(balls)):
-            for j in range(i + 1, len(balls)):
-                check_ball_ball_collision(balls[i], balls[j])
+    if profiler.frames:
+        frames = profiler.export_csv(profile_csv)
+        print(f"Wrote {frames} profiled frames to {profile_csv}")
+    if recorder is not None:
+        recorder.close()
+        print(f"Recorded {recorder.records} steps to {record_path}")
+    pygame.quit()
+    sys.exit()
 
-        # Draw everything
-        screen.fill(WHITE)
 
-        # Draw hexagon
-        hexagon.draw(screen)
+def replay(path, speed=1.0):
+    """Play back a recorded trajectory without running any physics
 
-        # Draw balls
-        for ball in balls:
-            ball.draw(screen)
+    Space pauses, Left/Right seek, Up/Down change the playback rate and clicking
+    the progress bar jumps to that point.
+    """
+    trajectory = TrajectoryReplay(path)
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(f"Replay: {os.path.basename(path)}")
+    clock = pygame.time.Clock()
+    status_text = CachedText(pygame.font.Font(None, 24), BLACK)
 
-        # Draw UI
-        add_ball_button.draw(screen)
-        speed_slider.draw(screen)
+    hexagon = Hexagon(trajectory.center_x, trajectory.center_y, trajectory.radius)
+    balls = []
+    for _, radius, red, green, blue in trajectory.spawns:
+        ball = Ball(0, 0, radius)
+        ball.color = (red, green, blue)
+        balls.append(ball)
+
+    last_step = trajectory.records - 1
+    seek_steps = SEEK_SECONDS * trajectory.step_hz
+    values = trajectory.values
+    position = 0.0
+    paused = False
+    last_time = time.perf_counter()
 
-        # Draw ball count
-        ball_count_text = font.render(f"Balls: {len(balls)}", True, BLACK)
-        screen.blit(ball_count_text, (WIDTH - 150, 20))
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    position += seek_steps
+                elif event.key == pygame.K_LEFT:
+                    position -= seek_steps
+                elif event.key == pygame.K_UP:
+                    speed = min(speed * 2, 64.0)
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed / 2, 0.125)
+                elif event.key == pygame.K_HOME:
+                    position = 0.0
+                elif event.key == pygame.K_END:
+                    position = last_step
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.pos[1] >= HEIGHT - 20:
+                position = event.pos[0] / WIDTH * last_step
+
+        now = time.perf_counter()
+        if not paused:
+            position += (now - last_time) * trajectory.step_hz * speed
+        last_time = now
+        position = min(max(position, 0.0), last_step)
+
+        # Interpolate between the two recorded steps around the playback position
+        step = int(position)
+        alpha = position - step
+        prev_angle, count, prev_base = trajectory.frame(step)
+        angle, _, base = trajectory.frame(min(step + 1, last_step))
+        hexagon.prev_angle = prev_angle
+        if angle != hexagon.angle:
+            hexagon.angle = angle
+            hexagon._update_geometry()
+        for i, ball in enumerate(balls[:count]):
+            ball.prev_x = values[prev_base + 2 * i]
+            ball.prev_y = values[prev_base + 2 * i + 1]
+            ball.x = values[base + 2 * i]
+            ball.y = values[base + 2 * i + 1]
 
-        # Draw instructions
-        instructions = [
-            "Click 'Add Ball' to add more balls",
-            "Use slider to control hexagon rotation",
-            "Watch balls bounce and collide!",
-        ]
+        screen.fill(WHITE)
+        hexagon.draw(screen, alpha)
+        for ball in balls[:count]:
+            ball.draw(screen, alpha)
 
-        small_font = pygame.font.Font(None, 20)
-        for i, instruction in enumerate(instructions):
-            text = small_font.render(instruction, True, BLACK)
-            screen.blit(text, (20, HEIGHT - 80 + i * 20))
+        pygame.draw.rect(screen, LIGHT_GRAY, (0, HEIGHT - 20, WIDTH, 20))
+        pygame.draw.rect(screen, GRAY, (0, HEIGHT - 20, int(WIDTH * position / max(last_step, 1)), 20))
+        state = "paused" if paused else f"x{speed:g}"
+        screen.blit(status_text.render(f"Step {step}/{last_step}  {state}  Balls: {count}"), (20, 20))
 
         pygame.display.flip()
         clock.tick(FPS)
 
+    values = None
+    trajectory.close()
     pygame.quit()
-    sys.exit()
+
+
+def make_benchmark_scene(count, seed=0):
+    """Build a hexagon and count balls at a fill ratio similar to a busy interactive scene"""
+    rng = random.Random(seed)
+    # Grow the hexagon with the ball count so density stays comparable across sizes
+    radius = max(200, 30 * math.sqrt(count))
+    hexagon = Hexagon(radius, radius, radius)
+    balls = []
+    for _ in range(count):
+        r = radius * 0.8 * math.sqrt(rng.random())
+        theta = rng.uniform(0, 2 * math.pi)
+        ball = Ball(radius + r * math.cos(theta), radius + r * math.sin(theta))
+        ball.vx = rng.uniform(-3, 3)
+        ball.vy = rng.uniform(-3, 3)
+        balls.append(ball)
+    return hexagon, balls
+
+
+def count_contacts(pairs):
+    """Count the overlapping pairs among the given candidates"""
+    return sum(
+        1 for ball1, ball2 in pairs if math.hypot(ball2.x - ball1.x, ball2.y - ball1.y) < ball1.radius + ball2.radius
+    )
+
+
+def benchmark_broadphase(counts=(100, 1000, 10000)):
+    """Compare candidate pair counts and step time of the spatial hash against the brute-force loop"""
+    print(f"{'balls':>7} {'method':>12} {'pairs/step':>12} {'contacts':>9} {'ms/step':>10}")
+    for count in counts:
+        # Brute force is quadratic, so large scenes only get a single step
+        steps = max(1, 2000 // count)
+        for name, broadphase in (("brute-force", None), ("spatial-hash", SpatialHash())):
+            hexagon, balls = make_benchmark_scene(count)
+
+            if broadphase is None:
+                pairs = count * (count - 1) // 2
+                contacts = count_contacts(brute_force_pairs(balls)) if count <= 1000 else "-"
+            else:
+                broadphase.rebuild(balls)
+                pairs = sum(1 for _ in broadphase.candidate_pairs())
+                contacts = count_contacts(broadphase.candidate_pairs())
+
+            start = time.perf_counter()
+            for _ in range(steps):
+                step_physics(hexagon, balls, broadphase)
+            elapsed = (time.perf_counter() - start) / steps
+            print(f"{count:>7} {name:>12} {pairs:>12} {contacts:>9} {elapsed * 1000:>10.2f}")
+
+
+def benchmark_backends(counts=(100, 1000, 10000), steps=20):
+    """Compare the time per step of the Python and NumPy physics backends"""
+    print(f"{'balls':>7} {'backend':>8} {'ms/step':>10} {'us/ball-step':>13}")
+    for count in counts:
+        for name, engine_class in ENGINES.items():
+            hexagon, balls = make_benchmark_scene(count)
+            engine = engine_class()
+            for ball in balls:
+                engine.add(ball)
+
+            start = time.perf_counter()
+            for _ in range(steps):
+                engine.step(hexagon)
+            engine.sync()
+            elapsed = (time.perf_counter() - start) / steps
+            print(f"{count:>7} {name:>8} {elapsed * 1000:>10.2f} {elapsed * 1e6 / count:>13.2f}")
+
+
+def worst_overlap(balls):
+    """Return the deepest interpenetration of any two balls, in pixels"""
+    broadphase = SpatialHash()
+    broadphase.rebuild(balls)
+    return max(
+        (
+            ball1.radius + ball2.radius - math.hypot(ball2.x - ball1.x, ball2.y - ball1.y)
+            for ball1, ball2 in broadphase.candidate_pairs()
+        ),
+        default=0.0,
+    )
+
+
+def settle_scene(backend, seed, ball_count, steps, sleeping):
+    """Drop a seeded scene into a still hexagon and return its mean kinetic energy per ball and worst overlap
+
+    The overlap is sampled every 20 steps over the second half of the run, once the pile has formed.
+    """
+    random.seed(seed)
+    hexagon = Hexagon(WIDTH // 2, HEIGHT // 2, 200)
+    hexagon.rotation_speed = 0.0
+    engine = ENGINES[backend](sleeping=sleeping)
+    for _ in range(ball_count):
+        spawn_ball(engine)
+
+    total_energy = 0.0
+    overlap = 0.0
+    for step in range(steps):
+        advance_physics(engine, hexagon)
+        total_energy += engine.kinetic_energy()
+        if step >= steps // 2 and step % 20 == 0:
+            engine.sync()
+            overlap = max(overlap, worst_overlap(engine.balls))
+    return total_energy / steps / ball_count, overlap
+
+
+def check_backends(seeds=(0, 1, 2), ball_count=100, steps=1200, energy_tolerance=0.5, overlap_tolerance=2.0):
+    """Check that the NumPy backend settles piles like the Python one; return whether every scene passed
+
+    A scene passes when its mean kinetic energy per ball is within energy_tolerance (relative)
+    of the Python backend's and its worst overlap at most overlap_tolerance pixels deeper.
+    """
+    print(f"{'sleeping':>8} {'seed':>5} {'backend':>8} {'energy/ball':>12} {'worst overlap':>14}")
+    passed = True
+    for sleeping in (False, True):
+        for seed in seeds:
+            reference_energy, reference_overlap = settle_scene("python", seed, ball_count, steps, sleeping)
+            energy, overlap = settle_scene("numpy", seed, ball_count, steps, sleeping)
+            ok = (
+                abs(energy - reference_energy) <= energy_tolerance * reference_energy
+                and overlap <= reference_overlap + overlap_tolerance
+            )
+            passed &= ok
+            print(f"{str(sleeping):>8} {seed:>5} {'python':>8} {reference_energy:>12.3f} {reference_overlap:>14.2f}")
+            print(f"{str(sleeping):>8} {seed:>5} {'numpy':>8} {energy:>12.3f} {overlap:>14.2f}  {'ok' if ok else 'FAIL'}")
+    return passed
+
+
+def benchmark_render(counts=(1000, 2000), frames=60):
+    """Compare the render-phase time of immediate-mode drawing against the sprite and text caches"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    add_ball_button = Button(20, 20, 100, 40, "Add Ball")
+    speed_slider = Slider(20, 80, 200, 20, -0.05, 0.05, 0)
+
+    print(f"{'balls':>7} {'renderer':>10} {'ms/frame':>10}")
+    for count in counts:
+        random.seed(count)
+        hexagon = Hexagon(WIDTH // 2, HEIGHT // 2, 200)
+        engine = BallEngine()
+        for _ in range(count):
+            spawn_ball(engine, spread=140)
+
+        for name, cached in (("immediate", False), ("cached", True)):
+            renderer = Renderer(screen, add_ball_button, speed_slider, cached)
+            start = time.perf_counter()
+            for _ in range(frames):
+                renderer.draw(hexagon, engine.balls)
+            elapsed = (time.perf_counter() - start) / frames
+            print(f"{count:>7} {name:>10} {elapsed * 1000:>10.2f}")
+    pygame.quit()
+
+
+def state_checksum(balls):
+    """Hash the exact positions and velocities of all balls"""
+    digest = hashlib.sha256()
+    for ball in balls:
+        digest.update(struct.pack("<4d", ball.x, ball.y, ball.vx, ball.vy))
+    return digest.hexdigest()[:16]
+
+
+def run_headless(
+    seed,
+    ball_count,
+    rotation_speed,
+    steps,
+    backend="python",
+    substeps=SUBSTEPS,
+    gravity=GRAVITY,
+    friction=FRICTION,
+    bounce_damping=BOUNCE_DAMPING,
+    record_path=None,
+):
+    """Step a seeded scene without opening a window and return throughput, summary metrics and a checksum"""
+    random.seed(seed)
+    hexagon = Hexagon(WIDTH // 2, HEIGHT // 2, 200)
+    hexagon.rotation_speed = rotation_speed
+    engine = ENGINES[backend](gravity, friction, bounce_damping)
+    for _ in range(ball_count):
+        spawn_ball(engine)
+
+    recorder = None
+    if record_path:
+        recorder = TrajectoryRecorder(record_path, hexagon, max(ball_count, 1))
+        for ball in engine.balls:
+            recorder.spawn(ball)
+
+    # Only the physics is timed; sampling the energy and recording are bookkeeping
+    elapsed = 0.0
+    total_energy = 0.0
+    for _ in range(steps):
+        start = time.perf_counter()
+        advance_physics(engine, hexagon, substeps)
+        elapsed += time.perf_counter() - start
+        total_energy += engine.kinetic_energy()
+        if recorder is not None:
+            engine.sync()
+            recorder.record(hexagon.angle, engine.balls)
+    engine.sync()
+    if recorder is not None:
+        recorder.close()
+
+    return {
+        "steps_per_sec": steps / elapsed,
+        "ball_steps_per_sec": steps * ball_count / elapsed,
+        "mean_kinetic_energy": total_energy / steps / max(ball_count, 1),
+        "wall_hit_rate": engine.wall_hits / max(steps * ball_count, 1),
+        "checksum": state_checksum(engine.balls),
+    }
+
+
+# Sweep parameter names mapped to their run_headless keyword and value type
+SWEEP_PARAMETERS = {
+    "gravity": ("gravity", float),
+    "friction": ("friction", float),
+    "bounce_damping": ("bounce_damping", float),
+    "speed": ("rotation_speed", float),
+    "balls": ("ball_count", int),
+}
+
+
+def parse_sweep_grid(specs):
+    """Turn ["gravity=0.1,0.3", "balls=50,100"] into {"gravity": [0.1, 0.3], "balls": [50, 100]}"""
+    grid = {}
+    for spec in specs:
+        name, equals, values = spec.partition("=")
+        name = name.strip()
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter {name!r}, expected one of {', '.join(SWEEP_PARAMETERS)}")
+        if not equals:
+            raise ValueError(f"Sweep {spec!r} has no values, expected {name}=V1,V2")
+        value_type = SWEEP_PARAMETERS[name][1]
+        try:
+            grid[name] = [value_type(value) for value in values.split(",")]
+        except ValueError:
+            raise ValueError(f"Sweep {spec!r} has a value that is not a valid {value_type.__name__}") from None
+    return grid
+
+
+def run_sweep_case(case, seed, steps, backend, substeps):
+    """Run one headless scene for a sweep case; executed in a worker process
+
+    The case holds a value for every SWEEP_PARAMETERS name. The returned row records
+    every setting the run used followed by its results.
+    """
+    kwargs = {SWEEP_PARAMETERS[name][0]: value for name, value in case.items()}
+    result = run_headless(seed=seed, steps=steps, backend=backend, substeps=substeps, **kwargs)
+    return {"seed": seed, "steps": steps, "backend": backend, "substeps": substeps, **case, **result}
+
+
+def run_sweep(
+    grid,
+    output_path,
+    seed=0,
+    steps=1000,
+    backend="python",
+    substeps=SUBSTEPS,
+    workers=None,
+    ball_count=100,
+    rotation_speed=0.02,
+):
+    """Run every combination in the grid across a process pool, streaming one summary row per finished run
+
+    Parameters missing from the grid keep ball_count, rotation_speed or the physics defaults.
+    """
+    base = {
+        "gravity": GRAVITY,
+        "friction": FRICTION,
+        "bounce_damping": BOUNCE_DAMPING,
+        "speed": rotation_speed,
+        "balls": ball_count,
+    }
+    names = list(grid)
+    cases = [{**base, **dict(zip(names, values))} for values in itertools.product(*(grid[name] for name in names))]
+    use_csv = output_path.endswith(".csv")
+    fields = ["seed", "steps", "backend", "substeps", *base]
+    fields += ["steps_per_sec", "ball_steps_per_sec", "mean_kinetic_energy", "wall_hit_rate", "checksum"]
+
+    start = time.perf_counter()
+    with open(output_path, "w", newline="") as output, ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = csv.DictWriter(output, fieldnames=fields) if use_csv else None
+        if writer is not None:
+            writer.writeheader()
+
+        futures = [pool.submit(run_sweep_case, case, seed, steps, backend, substeps) for case in cases]
+        for done, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            if writer is not None:
+                writer.writerow(row)
+            else:
+                output.write(json.dumps(row) + "\n")
+            output.flush()
+            print(f"[{done}/{len(cases)}] {row['steps_per_sec']:.0f} steps/sec", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(cases)} runs in {elapsed:.2f}s ({len(cases) * steps / elapsed:.0f} scene-steps/sec)", file=sys.stderr)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Bouncing balls in a rotating hexagon")
+    parser.add_argument("--bench-broadphase", action="store_true", help="compare broadphase strategies and exit")
+    parser.add_argument("--bench-backends", action="store_true", help="compare physics backends and exit")
+    parser.add_argument("--bench-render", action="store_true", help="compare cached and immediate drawing and exit")
+    parser.add_argument(
+        "--check-backends", action="store_true", help="check the numpy backend settles piles like the python one"
+    )
+    parser.add_argument("--no-render-cache", action="store_true", help="draw balls and text without caching")
+    parser.add_argument("--profile", action="store_true", help="start with per-phase profiling on (toggle with F3)")
+    parser.add_argument("--profile-csv", default="hexagon_profile.csv", help="per-frame profile written on exit")
+    parser.add_argument("--record", metavar="PATH", help="record the run's trajectory to a binary file")
+    parser.add_argument(
+        "--record-capacity", type=int, default=RECORD_CAPACITY, help="most balls held by an interactive recording"
+    )
+    parser.add_argument("--replay", metavar="PATH", help="play back a recorded trajectory without physics")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="initial playback rate for --replay")
+    parser.add_argument(
+        "--backend",
+        choices=sorted(ENGINES),
+        default="python",
+        help="physics backend; numpy is only faster with about 1000+ balls in a large hexagon (see --bench-backends)",
+    )
+    parser.add_argument("--headless", action="store_true", help="run the physics without a window and report throughput")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for --headless and --sweep")
+    parser.add_argument("--balls", type=int, default=100, help="ball count for --headless and --sweep")
+    parser.add_argument("--speed", type=float, default=0.02, help="hexagon rotation speed in radians per step")
+    parser.add_argument("--steps", type=int, default=1000, help="physics steps for --headless and --sweep")
+    parser.add_argument("--substeps", type=int, default=SUBSTEPS, help="physics substeps per fixed step")
+    parser.add_argument(
+        "--sweep",
+        action="append",
+        metavar="NAME=V1,V2",
+        help=f"sweep a parameter headlessly ({', '.join(SWEEP_PARAMETERS)}); repeat for a grid",
+    )
+    parser.add_argument("--sweep-output", default="sweep.jsonl", help="sweep results file (.jsonl or .csv)")
+    parser.add_argument("--workers", type=int, default=None, help="sweep worker processes (default: all cores)")
+    args = parser.parse_args()
+    if args.steps < 1:
+        parser.error("--steps must be at least 1")
+
+    grid = None
+    if args.sweep:
+        try:
+            grid = parse_sweep_grid(args.sweep)
+        except ValueError as error:
+            parser.error(str(error))
+
+    if args.replay:
+        replay(args.replay, args.replay_speed)
+    elif grid:
+        run_sweep(
+            grid,
+            args.sweep_output,
+            args.seed,
+            args.steps,
+            args.backend,
+            args.substeps,
+            args.workers,
+            args.balls,
+            args.speed,
+        )
+    elif args.headless:
+        result = run_headless(
+            args.seed, args.balls, args.speed, args.steps, args.backend, args.substeps, record_path=args.record
+        )
+        print(f"steps/sec: {result['steps_per_sec']:.1f}")
+        print(f"ball-steps/sec: {result['ball_steps_per_sec']:.0f}")
+        print(f"mean kinetic energy: {result['mean_kinetic_energy']:.4f}")
+        print(f"wall-hit rate: {result['wall_hit_rate']:.4f}")
+        print(f"checksum: {result['checksum']}")
+    elif args.bench_broadphase:
+        benchmark_broadphase()
+    elif args.bench_backends:
+        benchmark_backends()
+    elif args.bench_render:
+        benchmark_render()
+    elif args.check_backends:
+        sys.exit(0 if check_backends() else 1)
+    else:
+        main(
+            args.backend,
+            args.substeps,
+            not args.no_render_cache,
+            args.profile,
+            args.profile_csv,
+            args.record,
+            args.record_capacity,
+        )
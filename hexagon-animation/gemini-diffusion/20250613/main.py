@@ -1,6 +1,13 @@
+import argparse
+import hashlib
+import queue
+import threading
 import tkinter as tk
 import math
 import random
+import struct
+import time
+from collections import Counter, namedtuple
 
 # --- Constants ---
 WIDTH = 800
@@ -16,13 +23,26 @@ INITIAL_BALLS = 5
 INITIAL_ANGULAR_SPEED = 0.02  # radians per frame
 MAX_ANGULAR_SPEED = 0.05  # radians per frame
 MIN_ANGULAR_SPEED = 0.00  # radians per frame
+FRAME_HZ = 1000 / 30  # Default target render rate
+PHYSICS_HZ = 1000 / 30  # Physics rate that GRAVITY and FRICTION are tuned per step for
+SUBSTEPS = 2  # Physics substeps per fixed step
+MAX_CATCH_UP_STEPS = 5  # Most physics steps run in one frame before the backlog is dropped
 
 # --- Global Variables ---
 balls = []
 angular_speed = INITIAL_ANGULAR_SPEED
+substeps = SUBSTEPS
+frame_hz = FRAME_HZ
+physics_hz = PHYSICS_HZ
+scheduler = None
+worker = None
 canvas = None
+hexagon_item = None
+ball_items = []
+drawn_vertices = None
 root = None
 speed_scale = None
+fps_label = None
 
 # --- Helper Functions ---
 
@@ -64,25 +84,23 @@ class Ball:
         self.vx = vx
         self.vy = vy
         self.color = color
-        self.id = canvas.create_oval(
-            x - BALL_RADIUS, y - BALL_RADIUS, x + BALL_RADIUS, y + BALL_RADIUS, fill=color, outline="black"
-        )
+        # Position at the start of the current physics step, for render interpolation
+        self.prev_x = x
+        self.prev_y = y
 
-    def update(self):
-        """Updates the ball's position and velocity."""
+    def update(self, dt=1.0):
+        """Updates the ball's position and velocity over dt physics steps."""
         # Apply gravity
-        self.vy += GRAVITY
+        self.vy += GRAVITY * dt
 
         # Apply friction
-        self.vx *= FRICTION
-        self.vy *= FRICTION
+        friction = FRICTION**dt
+        self.vx *= friction
+        self.vy *= friction
 
         # Update position
-        self.x += self.vx
-        self.y += self.vy
-
-        # Update canvas object
-        canvas.coords(self.id, self.x - BALL_RADIUS, self.y - BALL_RADIUS, self.x + BALL_RADIUS, self.y + BALL_RADIUS)
+        self.x += self.vx * dt
+        self.y += self.vy * dt
 
     def check_wall_collisions(self, hex_vertices):
         """Checks for collisions with the hexagon walls."""
@@ -157,7 +175,6 @@ class Ball:
                 overlap = BALL_RADIUS - dist
                 self.x += normal_x * overlap
                 self.y += normal_y * overlap
-                canvas.coords(self.id, self.x - BALL_RADIUS, self.y - BALL_RADIUS, self.x + BALL_RADIUS, self.y + BALL_RADIUS)
                 return True  # Collision occurred
         return False
 
@@ -212,17 +229,6 @@ class Ball:
                     self.y += normal_y * overlap / 2
                     other_ball.x -= normal_x * overlap / 2
                     other_ball.y -= normal_y * overlap / 2
-
-                    canvas.coords(
-                        self.id, self.x - BALL_RADIUS, self.y - BALL_RADIUS, self.x + BALL_RADIUS, self.y + BALL_RADIUS
-                    )
-                    canvas.coords(
-                        other_ball.id,
-                        other_ball.x - BALL_RADIUS,
-                        other_ball.y - BALL_RADIUS,
-                        other_ball.x + BALL_RADIUS,
-                        other_ball.y + BALL_RADIUS,
-                    )
                     return True  # Collision occurred
         return False
 
@@ -246,41 +252,234 @@ def update_speed(value):
     angular_speed = MIN_ANGULAR_SPEED + (MAX_ANGULAR_SPEED - MIN_ANGULAR_SPEED) * (float(value) / 100.0)
 
 
-def animate():
-    """Main animation function."""
-    global angular_speed
+_rotated_vertices_cache = {}
 
-    # Get current hexagon vertices
-    hex_vertices = get_hexagon_vertices(CENTER_X, CENTER_Y, HEX_RADIUS)
 
-    # Rotate hexagon vertices
-    rotated_vertices = [rotate_point(v, (CENTER_X, CENTER_Y), angular_speed) for v in hex_vertices]
+def get_rotated_hexagon_vertices():
+    """Returns the hexagon vertices rotated by the current angular speed."""
+    # The rotation only depends on the slider, so reuse the vertices until it moves
+    vertices = _rotated_vertices_cache.get(angular_speed)
+    if vertices is None:
+        # Get current hexagon vertices
+        hex_vertices = get_hexagon_vertices(CENTER_X, CENTER_Y, HEX_RADIUS)
 
-    # Update hexagon drawing
-    canvas.delete("hexagon")
-    canvas.create_polygon(rotated_vertices, outline="black", fill="lightgray", width=2, tags="hexagon")
+        # Rotate hexagon vertices
+        vertices = tuple(rotate_point(v, (CENTER_X, CENTER_Y), angular_speed) for v in hex_vertices)
+        _rotated_vertices_cache.clear()
+        _rotated_vertices_cache[angular_speed] = vertices
+    return vertices
+
+
+def step_physics(dt=1.0):
+    """Advances every ball by dt physics steps."""
+    rotated_vertices = get_rotated_hexagon_vertices()
 
     # Update balls and check collisions
     for ball in balls:
-        ball.update()
+        ball.update(dt)
         ball.check_wall_collisions(rotated_vertices)
         ball.check_ball_collisions(balls)
 
-    # Schedule next frame
-    root.after(30, animate)  # Run approximately 30 times per second
+
+def advance_physics():
+    """Runs one fixed physics step split into equal substeps."""
+    for ball in balls:
+        ball.prev_x = ball.x
+        ball.prev_y = ball.y
+    # Steps at a different physics_hz cover proportionally more or less simulated time
+    step_scale = PHYSICS_HZ / physics_hz
+    for _ in range(substeps):
+        step_physics(step_scale / substeps)
+
+
+class FixedTimestep:
+    """Accumulator that turns variable frame times into a whole number of fixed physics steps."""
+
+    def __init__(self, step_hz=PHYSICS_HZ, max_steps=MAX_CATCH_UP_STEPS):
+        self.step_time = 1.0 / step_hz
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def advance(self, now):
+        """Returns how many physics steps are due for the time elapsed since the last call."""
+        if self.last_time is None:
+            self.last_time = now
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        steps = int(self.accumulator // self.step_time)
+        if steps > self.max_steps:
+            # Drop the backlog rather than falling further behind every frame
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step_time
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction of a step elapsed since the newest physics state, used to interpolate drawing."""
+        return min(self.accumulator / self.step_time, 1.0)
+
+
+# --- Physics Thread ---
+
+# Immutable view of the simulation published by the physics thread after every step.
+# balls holds one (prev_x, prev_y, x, y, color) tuple per ball.
+Snapshot = namedtuple("Snapshot", "time vertices balls")
+
+
+def take_snapshot():
+    """Copies the state the GUI needs to draw a frame."""
+    return Snapshot(
+        time.perf_counter(),
+        get_rotated_hexagon_vertices(),
+        tuple((ball.prev_x, ball.prev_y, ball.x, ball.y, ball.color) for ball in balls),
+    )
+
+
+class PhysicsWorker(threading.Thread):
+    """Steps the simulation at physics_hz off the Tk thread and publishes the latest Snapshot.
+
+    The GUI never touches balls directly: it posts callables to commands, which run
+    between physics steps, and reads the snapshot attribute, which is replaced whole.
+    """
+
+    def __init__(self):
+        super().__init__(name="physics", daemon=True)
+        self.commands = queue.Queue()
+        self.snapshot = take_snapshot()
+        self.stopped = threading.Event()
+
+    def run(self):
+        timestep = FixedTimestep(physics_hz)
+        while not self.stopped.is_set():
+            while True:
+                try:
+                    command = self.commands.get_nowait()
+                except queue.Empty:
+                    break
+                command()
+
+            for _ in range(timestep.advance(time.perf_counter())):
+                advance_physics()
+                self.snapshot = take_snapshot()
+
+            # Sleep until the next step is due
+            self.stopped.wait(max(timestep.step_time - timestep.accumulator, 0.001))
+
+    def stop(self):
+        self.stopped.set()
+
+
+# --- Rendering ---
+
+
+def draw_frame(snapshot):
+    """Moves the canvas items to match a snapshot, interpolating toward its newest state."""
+    global drawn_vertices
+
+    # The hexagon polygon is created once; only touch it when its vertices change
+    if snapshot.vertices is not drawn_vertices:
+        canvas.coords(hexagon_item, *[coord for vertex in snapshot.vertices for coord in vertex])
+        drawn_vertices = snapshot.vertices
+
+    # Create ovals for balls added since the last frame
+    for prev_x, prev_y, _, _, color in snapshot.balls[len(ball_items) :]:
+        ball_items.append(
+            canvas.create_oval(
+                prev_x - BALL_RADIUS,
+                prev_y - BALL_RADIUS,
+                prev_x + BALL_RADIUS,
+                prev_y + BALL_RADIUS,
+                fill=color,
+                outline="black",
+            )
+        )
+
+    # Draw balls between the last two physics states, one coords call each
+    alpha = min((time.perf_counter() - snapshot.time) * physics_hz, 1.0)
+    for item, (prev_x, prev_y, x, y, _) in zip(ball_items, snapshot.balls):
+        x = prev_x + (x - prev_x) * alpha
+        y = prev_y + (y - prev_y) * alpha
+        canvas.coords(item, x - BALL_RADIUS, y - BALL_RADIUS, x + BALL_RADIUS, y + BALL_RADIUS)
+
+
+class FrameScheduler:
+    """Paces frames against fixed deadlines on a monotonic clock instead of a fixed delay.
+
+    Work time is absorbed into the wait for the next deadline, so the frame rate does not
+    drift with load. When a callback arrives a whole frame or more late, the missed frames
+    are skipped rather than rendered back to back.
+    """
+
+    def __init__(self, target_hz=FRAME_HZ):
+        self.frame_time = 1.0 / target_hz
+        self.next_deadline = None
+        self.rendered = 0
+        self.skipped = 0
+        self.fps = 0.0
+        self.window_start = None
+        self.window_frames = 0
+
+    def start_frame(self, now):
+        """Advances the deadline past now, counting any frames that were missed."""
+        if self.next_deadline is None:
+            self.next_deadline = now
+            self.window_start = now
+        behind = now - self.next_deadline
+        if behind >= self.frame_time:
+            missed = int(behind // self.frame_time)
+            self.skipped += missed
+            self.next_deadline += missed * self.frame_time
+        self.next_deadline += self.frame_time
+
+        self.rendered += 1
+        self.window_frames += 1
+        if now - self.window_start >= 1.0:
+            self.fps = self.window_frames / (now - self.window_start)
+            self.window_start = now
+            self.window_frames = 0
+            return True
+        return False
+
+    def delay_ms(self, now):
+        """Returns the Tk after() delay until the next deadline."""
+        return max(0, round((self.next_deadline - now) * 1000))
+
+
+def animate():
+    """Main animation function."""
+    if scheduler.start_frame(time.perf_counter()):
+        fps_label.config(text=f"{scheduler.fps:.1f} FPS, {scheduler.skipped} skipped")
+
+    draw_frame(worker.snapshot)
+
+    # Schedule the next frame at its deadline, less the time this one took
+    root.after(scheduler.delay_ms(time.perf_counter()), animate)
 
 
 # --- GUI Setup ---
 
 
+def close_gui():
+    """Stops the physics thread and closes the window."""
+    worker.stop()
+    root.destroy()
+
+
 def setup_gui():
-    global root, canvas, speed_scale
+    global root, canvas, hexagon_item, speed_scale, fps_label, scheduler, worker
 
     root = tk.Tk()
     root.title("Bouncing Balls in Spinning Hexagon")
 
     canvas = tk.Canvas(root, width=WIDTH, height=HEIGHT, bg="white")
     canvas.pack()
+    hexagon_item = canvas.create_polygon(
+        get_rotated_hexagon_vertices(), outline="black", fill="lightgray", width=2, tags="hexagon"
+    )
 
     # Add initial balls
     for _ in range(INITIAL_BALLS):
@@ -297,17 +496,165 @@ def setup_gui():
     speed_scale.set((angular_speed - MIN_ANGULAR_SPEED) / (MAX_ANGULAR_SPEED - MIN_ANGULAR_SPEED) * 100)
     speed_scale.pack(side=tk.LEFT, padx=5)
 
+    # Start physics before the button so there is a worker to queue new balls on
+    worker = PhysicsWorker()
+    worker.start()
+
     # Add ball button
-    add_ball_button = tk.Button(control_frame, text="Add Ball", command=add_ball)
+    add_ball_button = tk.Button(control_frame, text="Add Ball", command=lambda: worker.commands.put(add_ball))
     add_ball_button.pack(side=tk.LEFT, padx=20)
 
+    # Achieved frame rate, refreshed once per second
+    fps_label = tk.Label(control_frame, text="", width=22, anchor=tk.W)
+    fps_label.pack(side=tk.LEFT, padx=5)
+
     # Start animation
+    scheduler = FrameScheduler(frame_hz)
+    root.protocol("WM_DELETE_WINDOW", close_gui)
     animate()
 
     root.mainloop()
 
 
+# --- Headless Mode ---
+
+
+def state_checksum():
+    """Hashes the exact positions and velocities of all balls."""
+    digest = hashlib.sha256()
+    for ball in balls:
+        digest.update(struct.pack("<4d", ball.x, ball.y, ball.vx, ball.vy))
+    return digest.hexdigest()[:16]
+
+
+def run_headless(seed, ball_count, rotation_speed, steps):
+    """Steps a seeded scene without Tk and returns throughput and a final-state checksum."""
+    global angular_speed
+
+    random.seed(seed)
+    angular_speed = rotation_speed
+    balls.clear()
+    for _ in range(ball_count):
+        add_ball()
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        advance_physics()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "steps_per_sec": steps / elapsed,
+        "ball_steps_per_sec": steps * ball_count / elapsed,
+        "checksum": state_checksum(),
+    }
+
+
+class CountingCanvas:
+    """Stand-in for tk.Canvas that counts the calls draw_frame makes instead of drawing."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.items = 0
+
+    def _create(self, kind):
+        self.calls[kind] += 1
+        self.items += 1
+        return self.items
+
+    def create_oval(self, *args, **kwargs):
+        return self._create("create_oval")
+
+    def create_polygon(self, *args, **kwargs):
+        return self._create("create_polygon")
+
+    def coords(self, item, *args):
+        self.calls["coords"] += 1
+
+    def delete(self, *args):
+        self.calls["delete"] += 1
+
+
+def bench_frames(seed, ball_count, rotation_speed, seconds):
+    """Runs the frame loop against a CountingCanvas while the physics thread steps a seeded scene.
+
+    Frames are paced by FrameScheduler as in animate(), with time.sleep() standing in for
+    root.after(). Returns the achieved frame rate, the time spent in draw_frame() and the
+    canvas calls per frame.
+    """
+    global angular_speed, canvas, hexagon_item, drawn_vertices
+
+    random.seed(seed)
+    angular_speed = rotation_speed
+    balls.clear()
+    for _ in range(ball_count):
+        add_ball()
+    canvas = CountingCanvas()
+    hexagon_item = canvas.create_polygon(get_rotated_hexagon_vertices())
+    canvas.calls.clear()
+    ball_items.clear()
+    drawn_vertices = None
+
+    physics = PhysicsWorker()
+    physics.start()
+    frames = FrameScheduler(frame_hz)
+    draw_times = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        frames.start_frame(time.perf_counter())
+        draw_start = time.perf_counter()
+        draw_frame(physics.snapshot)
+        draw_times.append(time.perf_counter() - draw_start)
+        time.sleep(frames.delay_ms(time.perf_counter()) / 1000)
+    elapsed = time.perf_counter() - start
+    physics.stop()
+    physics.join()
+
+    return {
+        "fps": frames.rendered / elapsed,
+        "skipped": frames.skipped,
+        "draw_ms": sum(draw_times) * 1000 / len(draw_times),
+        "worst_draw_ms": max(draw_times) * 1000,
+        "calls_per_frame": {name: count / frames.rendered for name, count in sorted(canvas.calls.items())},
+    }
+
+
 # --- Main Execution ---
 
 if __name__ == "__main__":
-    setup_gui()
+    parser = argparse.ArgumentParser(description="Bouncing balls in a spinning hexagon")
+    parser.add_argument("--headless", action="store_true", help="run the physics without a window and report throughput")
+    parser.add_argument(
+        "--bench-frames", action="store_true", help="run the frame loop against a call-counting canvas and report frame rate"
+    )
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of --bench-frames")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for --headless and --bench-frames")
+    parser.add_argument("--balls", type=int, default=100, help="ball count for --headless and --bench-frames")
+    parser.add_argument("--speed", type=float, default=0.02, help="hexagon rotation speed in radians per step")
+    parser.add_argument("--steps", type=int, default=1000, help="physics steps for --headless")
+    parser.add_argument("--substeps", type=int, default=SUBSTEPS, help="physics substeps per fixed step")
+    parser.add_argument("--fps", type=float, default=FRAME_HZ, help="target render rate in frames per second")
+    parser.add_argument("--physics-hz", type=float, default=PHYSICS_HZ, help="physics steps per second")
+    args = parser.parse_args()
+    if args.steps < 1:
+        parser.error("--steps must be at least 1")
+    if args.fps <= 0:
+        parser.error("--fps must be positive")
+    if args.physics_hz <= 0:
+        parser.error("--physics-hz must be positive")
+    substeps = args.substeps
+    frame_hz = args.fps
+    physics_hz = args.physics_hz
+
+    if args.headless:
+        result = run_headless(args.seed, args.balls, args.speed, args.steps)
+        print(f"steps/sec: {result['steps_per_sec']:.1f}")
+        print(f"ball-steps/sec: {result['ball_steps_per_sec']:.0f}")
+        print(f"checksum: {result['checksum']}")
+    elif args.bench_frames:
+        result = bench_frames(args.seed, args.balls, args.speed, args.seconds)
+        print(f"fps: {result['fps']:.1f} ({result['skipped']} frames skipped)")
+        print(f"draw_frame: {result['draw_ms']:.2f} ms mean, {result['worst_draw_ms']:.2f} ms worst")
+        for name, count in result["calls_per_frame"].items():
+            print(f"{name}/frame: {count:.1f}")
+    else:
+        setup_gui()
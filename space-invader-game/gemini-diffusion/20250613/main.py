@@ -1,15 +1,27 @@
+import argparse
+import gc
+import hashlib
+import itertools
+import os
 import pygame
 import random
 import math
-
-# Initialize Pygame
-pygame.init()
+import struct
+import subprocess
+import sys
+import time
+import tracemalloc
 
 # Screen dimensions
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Modern Space Invaders")
+# Game logic runs in fixed ticks at this rate; all speeds below are per tick
+FPS = 60
+# Most ticks simulated in one frame before the backlog is dropped
+MAX_CATCH_UP_TICKS = 5
+# The window and font are created by init_display(), so importing this module opens nothing
+screen = None
+font = None
 
 # Colors
 WHITE = (255, 255, 255)
@@ -26,10 +38,88 @@ LIGHT_BLUE = (100, 149, 237)
 LIGHT_GREEN = (50, 205, 50)
 LIGHT_RED = (255, 99, 71)
 
+
+# Entities
+class Bullet:
+    """Pooled bullet record; its rect is allocated once and moved with the bullet."""
+
+    __slots__ = ("x", "y", "width", "height", "rect", "slot")
+
+    def __init__(self, width, height):
+        self.x = 0
+        self.y = 0
+        self.width = width
+        self.height = height
+        self.rect = pygame.Rect(0, 0, width, height)
+        self.slot = 0
+
+    def place(self, x, y):
+        """Moves the bullet and its rect to (x, y)."""
+        self.x = x
+        self.y = y
+        self.rect.x = x
+        self.rect.y = y
+
+
+class Invader:
+    """One invader; its screen position is the formation offset plus its fixed cell offset."""
+
+    __slots__ = ("rel_x", "rel_y", "color", "row", "col", "slot")
+
+    def __init__(self, rel_x, rel_y, color, row, col):
+        self.rel_x = rel_x
+        self.rel_y = rel_y
+        self.color = color
+        self.row = row
+        self.col = col
+        self.slot = 0
+
+
+class Pool:
+    """Fixed-capacity entity storage that does not allocate after construction.
+
+    The live records are items[:count] and each knows its index in slot. acquire() hands
+    out the first free record; release() swaps the last live record into the freed slot,
+    so a sweep that releases items[i] must look at index i again.
+    """
+
+    def __init__(self, items, live=0):
+        self.items = items
+        for slot, item in enumerate(items):
+            item.slot = slot
+        self.count = live
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Iterates the live records; do not release while iterating."""
+        return itertools.islice(self.items, self.count)
+
+    def acquire(self):
+        """Returns a free record, or None when the pool is full."""
+        if self.count == len(self.items):
+            return None
+        item = self.items[self.count]
+        self.count += 1
+        return item
+
+    def release(self, item):
+        """Returns a live record to the free region."""
+        self.count -= 1
+        last = self.items[self.count]
+        slot = item.slot
+        self.items[slot] = last
+        last.slot = slot
+        self.items[self.count] = item
+        item.slot = self.count
+
+    def clear(self):
+        self.count = 0
+
 # Player settings
 player_width = 50
 player_height = 40
-player_x = SCREEN_WIDTH // 2 - player_width // 2
 player_y = SCREEN_HEIGHT - player_height - 20
 player_speed = 8
 player_color = CYAN
@@ -43,288 +133,1264 @@ invader_padding = 10
 invader_speed_x = 3
 invader_speed_y = 20
 invader_colors = [RED, ORANGE, YELLOW, GREEN, MAGENTA]
-invaders = []
+invader_pitch_x = invader_width + invader_padding
+invader_pitch_y = invader_height + invader_padding
+# Ticks a column waits between shots
+column_fire_interval = 60
 
 # Bullet settings
 bullet_width = 6
 bullet_height = 20
 bullet_speed = 10
 bullet_color = YELLOW
-bullets = []
+max_bullets = 64
 
 # Invader bullet settings
 invader_bullet_width = 4
 invader_bullet_height = 15
 invader_bullet_speed = 5
 invader_bullet_color = LIGHT_RED
-invader_bullets = []
+max_invader_bullets = 32
 
-# Game state
-game_over = False
+# Cleared by the interactive main() loop when the window is closed
 running = True
-score = 0
-
-# Font
-try:
-    font = pygame.font.Font(None, 48)  # Use default font
-except pygame.error:
-    # Fallback if default font is not available
-    print("Warning: Default font not found. Using fallback font.")
+
+# Environment actions are a bitmask of these controls
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_FIRE = 4
+MAX_EPISODE_STEPS = 20000
+# Recorded input streams also mark a restart (R after game over) with this bit
+INPUT_RESTART = 8
+
+# Input recording layout (little-endian): a fixed header holding the seed, the tick count
+# and the final-state checksum, then one control bitmask byte per game tick.
+INPUT_MAGIC = b"SIIR"
+INPUT_VERSION = 1
+INPUT_HEADER = struct.Struct("<4sIQI16s")
+# Seeds must fit the header's unsigned 64-bit field
+MAX_SEED = 2**64 - 1
+
+def load_font():
+    """Returns the 48px UI font, falling back to Arial, or None if neither can be loaded."""
     try:
-        font = pygame.font.SysFont("Arial", 48)
+        return pygame.font.Font(None, 48)  # Use default font
     except pygame.error:
-        print("Warning: Arial font not found. Using basic font.")
-        font = None
-
-
-def create_invaders():
-    """Creates the grid of invaders."""
-    global invaders
-    invaders = []
-    for row in range(invader_rows):
-        for col in range(invader_cols):
-            x = 50 + col * (invader_width + invader_padding)
-            y = 50 + row * (invader_height + invader_padding)
-            color = invader_colors[row % len(invader_colors)]
-            invaders.append(
-                {
-                    "x": x,
-                    "y": y,
-                    "width": invader_width,
-                    "height": invader_height,
-                    "color": color,
-                    "rect": pygame.Rect(x, y, invader_width, invader_height),
-                }
+        # Fallback if default font is not available
+        print("Warning: Default font not found. Using fallback font.")
+        try:
+            return pygame.font.SysFont("Arial", 48)
+        except pygame.error:
+            print("Warning: Arial font not found. Using basic font.")
+            return None
+
+
+def init_display():
+    """Opens the game window and loads the font on first call; later calls return the same screen.
+
+    Only the display and font subsystems are started. Headless runs never call this.
+    """
+    global screen, font
+    if screen is None:
+        pygame.display.init()
+        pygame.font.init()
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Modern Space Invaders")
+        font = load_font()
+    return screen
+
+
+class CachedText:
+    """Text surface that is only re-rendered when its string changes."""
+
+    def __init__(self, color):
+        self.color = color
+        self.text = None
+        self.surface = None
+
+    def render(self, text):
+        if text != self.text:
+            self.text = text
+            self.surface = font.render(text, True, self.color)
+        return self.surface
+
+
+score_text = CachedText(WHITE)
+game_over_text = CachedText(RED)
+final_score_text = CachedText(WHITE)
+restart_text = CachedText(YELLOW)
+
+# One pre-drawn sprite per invader colour, side by side, shared by every game's formation surface
+invader_atlas = None
+
+
+class Game:
+    """One game of Space Invaders: everything a game changes, and the rules that change it.
+
+    Games share no state, so any number of them can be stepped side by side in one
+    process. rows and cols size the formation and rng drives invader fire. Call reset()
+    before the first step().
+    """
+
+    def __init__(self, rows=invader_rows, cols=invader_cols, rng=None):
+        self.rows = rows
+        self.cols = cols
+        self.rng = rng or random.Random()
+        self.player_x = SCREEN_WIDTH // 2 - player_width // 2
+        self.player_rect = pygame.Rect(self.player_x, player_y, player_width, player_height)
+        self.score = 0
+        self.game_over = False
+        self.game_tick = 0
+        self.bullets = Pool([Bullet(bullet_width, bullet_height) for _ in range(max_bullets)])
+        self.invader_bullets = Pool(
+            [Bullet(invader_bullet_width, invader_bullet_height) for _ in range(max_invader_bullets)]
+        )
+        self.invader_speed_x = invader_speed_x
+        self.invaders = Pool([])
+        # invader_grid[row][col] is the live invader in that formation cell, or None once it is shot
+        self.invader_grid = []
+        # Top-left corner of the formation's first cell; every invader sits at a fixed offset from it
+        self.formation_x = 50
+        self.formation_y = 50
+        # The whole formation composited from the atlas; None until it is (re)built
+        self.formation_surface = None
+        # Live invaders per column and row, and the live bounding box in cells. These are updated
+        # as invaders die so the edge and bottom checks never scan the formation.
+        self.column_counts = []
+        self.row_counts = []
+        self.live_min_col = 0
+        self.live_max_col = -1
+        self.live_max_row = -1
+        # Fire control. front_row[col] is the bottom-most live row of each column (-1 once it is
+        # empty) and firing_columns lists the non-empty columns, column col at index
+        # column_slots[col], so a shooter is picked without looking at the rest of the formation.
+        self.front_row = []
+        self.firing_columns = []
+        self.column_slots = []
+        # The tick each column may next fire on
+        self.column_ready_tick = []
+
+    def create_invaders(self):
+        """Creates the grid of invaders."""
+        rows = self.rows
+        cols = self.cols
+        records = []
+        self.invader_grid = []
+        self.formation_x = 50
+        self.formation_y = 50
+        for row in range(rows):
+            grid_row = []
+            for col in range(cols):
+                color = invader_colors[row % len(invader_colors)]
+                invader = Invader(col * invader_pitch_x, row * invader_pitch_y, color, row, col)
+                records.append(invader)
+                grid_row.append(invader)
+            self.invader_grid.append(grid_row)
+        self.invaders = Pool(records, len(records))
+        self.formation_surface = None
+        self.column_counts = [rows] * cols
+        self.row_counts = [cols] * rows
+        self.live_min_col = 0
+        self.live_max_col = cols - 1
+        self.live_max_row = rows - 1
+        self.front_row = [rows - 1] * cols
+        self.firing_columns = list(range(cols))
+        self.column_slots = list(range(cols))
+        self.column_ready_tick = [0] * cols
+
+    def reset(self):
+        """Starts a new game with a fresh formation, no bullets and the player centred."""
+        self.game_over = False
+        self.game_tick = 0
+        self.score = 0
+        self.bullets.clear()
+        self.invader_bullets.clear()
+        self.invader_speed_x = abs(self.invader_speed_x)
+        self.create_invaders()
+        self.player_x = SCREEN_WIDTH // 2 - player_width // 2
+
+    def step(self, left, right, fire):
+        """Advances the game by one frame with the given controls held."""
+        self.game_tick += 1
+
+        if fire:
+            self.fire_bullet()
+
+        # Player movement
+        if left and self.player_x > 0:
+            self.player_x -= player_speed
+        if right and self.player_x < SCREEN_WIDTH - player_width:
+            self.player_x += player_speed
+
+        # Move bullets
+        self.move_bullets()
+        self.move_invader_bullets()
+
+        # Move invaders
+        self.move_invaders()
+
+        # Invader shooting
+        self.invader_shoot()
+
+        # Check collisions
+        self.check_collisions()
+
+    def fire_bullet(self):
+        """Spawns a player bullet at the ship's nose; the shot is dropped if the pool is full."""
+        bullet = self.bullets.acquire()
+        if bullet is not None:
+            bullet.place(self.player_x + player_width // 2 - bullet_width // 2, player_y)
+
+    def move_bullets(self):
+        """Moves player bullets, expiring those that leave the top of the screen."""
+        bullets = self.bullets
+        items = bullets.items
+        i = 0
+        while i < bullets.count:
+            bullet = items[i]
+            bullet.y -= bullet_speed
+            bullet.rect.y = bullet.y
+            if bullet.y < 0:
+                bullets.release(bullet)
+            else:
+                i += 1
+
+    def move_invader_bullets(self):
+        """Moves invader bullets, expiring those that leave the bottom of the screen."""
+        invader_bullets = self.invader_bullets
+        items = invader_bullets.items
+        i = 0
+        while i < invader_bullets.count:
+            bullet = items[i]
+            bullet.y += invader_bullet_speed
+            bullet.rect.y = bullet.y
+            if bullet.y > SCREEN_HEIGHT:
+                invader_bullets.release(bullet)
+            else:
+                i += 1
+
+    def move_invaders(self):
+        """Moves the invaders grid and checks for boundaries."""
+        if not self.invaders:
+            return
+
+        # Check boundaries of the live bounding box and reverse
+        self.formation_x += self.invader_speed_x
+        left = self.formation_x + self.live_min_col * invader_pitch_x
+        right = self.formation_x + self.live_max_col * invader_pitch_x + invader_width
+        if right >= SCREEN_WIDTH or left <= 0:
+            self.invader_speed_x *= -1
+            self.formation_y += invader_speed_y
+
+    def invader_overlaps(self, invader, rect):
+        """Tests rect against the invader's current on-screen rectangle."""
+        x = self.formation_x + invader.rel_x
+        y = self.formation_y + invader.rel_y
+        return rect.right > x and rect.left < x + invader_width and rect.bottom > y and rect.top < y + invader_height
+
+    def invader_hit_by(self, rect):
+        """Returns the first live invader overlapping rect, or None.
+
+        The formation cells under rect are computed from its coordinates, so at most two
+        columns by two rows are tested instead of every invader.
+        """
+        formation_x = self.formation_x
+        formation_y = self.formation_y
+        first_col = max((rect.left - formation_x) // invader_pitch_x, 0)
+        last_col = min((rect.right - 1 - formation_x) // invader_pitch_x, self.cols - 1)
+        first_row = max((rect.top - formation_y) // invader_pitch_y, 0)
+        last_row = min((rect.bottom - 1 - formation_y) // invader_pitch_y, self.rows - 1)
+        # Cells are visited in row-major order, so the top-left overlapping invader wins
+        for row in range(first_row, last_row + 1):
+            grid_row = self.invader_grid[row]
+            for col in range(first_col, last_col + 1):
+                invader = grid_row[col]
+                if invader is not None and self.invader_overlaps(invader, rect):
+                    return invader
+        return None
+
+    def destroy_invader(self, invader):
+        """Clears the invader's formation cell, returns it to the pool and shrinks the live bounding box."""
+        invader_grid = self.invader_grid
+        column_counts = self.column_counts
+        row_counts = self.row_counts
+        invader_grid[invader.row][invader.col] = None
+        self.invaders.release(invader)
+        if self.formation_surface is not None:
+            self.formation_surface.fill(BLACK, (invader.rel_x, invader.rel_y, invader_width, invader_height))
+        col = invader.col
+        column_counts[col] -= 1
+        row_counts[invader.row] -= 1
+
+        # The invader above takes over the column's fire; an emptied column stops firing
+        front_row = self.front_row
+        if invader.row == front_row[col]:
+            row = invader.row - 1
+            while row >= 0 and invader_grid[row][col] is None:
+                row -= 1
+            front_row[col] = row
+        if column_counts[col] == 0:
+            firing_columns = self.firing_columns
+            column_slots = self.column_slots
+            last = firing_columns.pop()
+            if last != col:
+                slot = column_slots[col]
+                firing_columns[slot] = last
+                column_slots[last] = slot
+
+        # Each column and row is stepped past at most once per formation, as is each cell above
+        while self.live_min_col <= self.live_max_col and column_counts[self.live_min_col] == 0:
+            self.live_min_col += 1
+        while self.live_max_col >= self.live_min_col and column_counts[self.live_max_col] == 0:
+            self.live_max_col -= 1
+        while self.live_max_row >= 0 and row_counts[self.live_max_row] == 0:
+            self.live_max_row -= 1
+
+    def check_bullet_hits(self):
+        """Removes player bullets and the invaders they hit, returning the number of hits."""
+        if not self.invaders:
+            return 0
+        # Bullets entirely above or below the live formation cannot hit anything
+        top = self.formation_y
+        bottom = self.formation_y + self.live_max_row * invader_pitch_y + invader_height
+        bullets = self.bullets
+        items = bullets.items
+        hits = 0
+        i = 0
+        while i < bullets.count:
+            bullet = items[i]
+            if bullet.y >= bottom or bullet.y + bullet.height <= top:
+                i += 1
+                continue
+            invader = self.invader_hit_by(bullet.rect)
+            if invader is not None:
+                self.destroy_invader(invader)
+                bullets.release(bullet)
+                hits += 1
+            else:
+                i += 1
+        return hits
+
+    def check_bullet_hits_brute_force(self):
+        """Reference version of check_bullet_hits() that tests every bullet against every invader."""
+        bullets = self.bullets
+        items = bullets.items
+        hits = 0
+        i = 0
+        while i < bullets.count:
+            bullet = items[i]
+            hit = None
+            for grid_row in self.invader_grid:
+                for invader in grid_row:
+                    if invader is not None and self.invader_overlaps(invader, bullet.rect):
+                        hit = invader
+                        break  # Bullet hits only one invader
+                if hit is not None:
+                    break
+            if hit is not None:
+                self.destroy_invader(hit)
+                bullets.release(bullet)
+                hits += 1
+            else:
+                i += 1
+        return hits
+
+    def check_collisions(self):
+        """Checks for collisions between bullets, invaders, and player."""
+        # Player bullets vs Invaders
+        self.score += 10 * self.check_bullet_hits()
+
+        # Invader bullets vs Player
+        player_rect = self.player_rect
+        player_rect.x = self.player_x
+        for bullet in self.invader_bullets:
+            if player_rect.colliderect(bullet.rect):
+                self.invader_bullets.release(bullet)
+                self.game_over = True
+                break
+
+        # Check if invaders reached the bottom
+        if self.invaders and self.formation_y + self.live_max_row * invader_pitch_y + invader_height >= player_y:
+            self.game_over = True
+
+    def pick_shooter(self):
+        """Returns the front invader of a random non-empty column."""
+        firing_columns = self.firing_columns
+        col = firing_columns[self.rng.randrange(len(firing_columns))]
+        return self.invader_grid[self.front_row[col]][col]
+
+    def pick_shooter_scan(self):
+        """Reference version of pick_shooter() that finds the columns and front invader by scanning the grid."""
+        invader_grid = self.invader_grid
+        columns = [col for col in range(self.cols) if any(grid_row[col] is not None for grid_row in invader_grid)]
+        col = columns[self.rng.randrange(len(columns))]
+        for row in range(self.rows - 1, -1, -1):
+            if invader_grid[row][col] is not None:
+                return invader_grid[row][col]
+
+    def invader_shoot(self):
+        """Randomly makes a front-line invader shoot, unless its column fired too recently."""
+        if not self.invaders:
+            return
+
+        if self.rng.random() < 0.01:  # 1% chance per frame (adjustable)
+            shooter_invader = self.pick_shooter()
+            if self.column_ready_tick[shooter_invader.col] > self.game_tick:
+                return
+            self.column_ready_tick[shooter_invader.col] = self.game_tick + column_fire_interval
+            bullet = self.invader_bullets.acquire()
+            if bullet is not None:
+                bullet.place(
+                    self.formation_x + shooter_invader.rel_x + invader_width // 2 - invader_bullet_width // 2,
+                    self.formation_y + shooter_invader.rel_y + invader_height,
+                )
+
+    def observe(self):
+        """Returns what a bot sees of the game."""
+        return {
+            "player_x": self.player_x,
+            "formation": (self.formation_x, self.formation_y),
+            "invaders": len(self.invaders),
+            "score": self.score,
+            "invader_bullets": [(bullet.x, bullet.y) for bullet in self.invader_bullets],
+        }
+
+    def state_checksum(self):
+        """Hashes everything that decides how the game continues from here."""
+        digest = hashlib.sha256()
+        digest.update(
+            struct.pack(
+                "<iiiii?",
+                self.player_x,
+                self.score,
+                self.formation_x,
+                self.formation_y,
+                self.invader_speed_x,
+                self.game_over,
             )
+        )
+        digest.update(bytes(invader is not None for grid_row in self.invader_grid for invader in grid_row))
+        for pool in (self.bullets, self.invader_bullets):
+            positions = sorted((bullet.x, bullet.y) for bullet in pool)
+            digest.update(struct.pack(f"<I{2 * len(positions)}i", len(positions), *itertools.chain(*positions)))
+        digest.update(repr(self.rng.getstate()).encode())
+        return digest.hexdigest()[:16]
 
 
-def draw_player():
+def draw_player(game):
     """Draws the player spaceship."""
+    player_x = game.player_x
     pygame.draw.rect(screen, player_color, (player_x, player_y, player_width, player_height))
     # Add a subtle glow effect
     pygame.draw.circle(screen, LIGHT_BLUE, (player_x + player_width // 2, player_y + player_height), player_width // 2, 2)
 
 
-def draw_invaders():
-    """Draws all invaders."""
-    for invader in invaders:
-        pygame.draw.rect(screen, invader["color"], invader["rect"])
+def build_invader_atlas():
+    """Draws one invader sprite per formation colour into a single surface."""
+    atlas = pygame.Surface((invader_width * len(invader_colors), invader_height)).convert()
+    for i, color in enumerate(invader_colors):
+        rect = (i * invader_width, 0, invader_width, invader_height)
+        pygame.draw.rect(atlas, color, rect)
+        pygame.draw.rect(atlas, WHITE, rect, 1)
+        pygame.draw.circle(
+            atlas, LIGHT_GREEN, (i * invader_width + invader_width // 2, invader_height // 2), invader_width // 4, 1
+        )
+    return atlas
+
+
+def build_formation_surface(game):
+    """Composites every live invader from the atlas into one surface with a transparent background."""
+    global invader_atlas
+    if invader_atlas is None:
+        invader_atlas = build_invader_atlas()
+    surface = pygame.Surface(
+        (game.cols * invader_pitch_x - invader_padding, game.rows * invader_pitch_y - invader_padding)
+    ).convert()
+    surface.fill(BLACK)
+    surface.set_colorkey(BLACK, pygame.RLEACCEL)
+    surface.blits(
+        [
+            (
+                invader_atlas,
+                (invader.rel_x, invader.rel_y),
+                ((invader.row % len(invader_colors)) * invader_width, 0, invader_width, invader_height),
+            )
+            for invader in game.invaders
+        ],
+        doreturn=False,
+    )
+    return surface
+
+
+def draw_invaders(game):
+    """Draws all invaders with one blit of the cached formation surface."""
+    if not game.invaders:
+        return
+    if game.formation_surface is None:
+        game.formation_surface = build_formation_surface(game)
+    screen.blit(game.formation_surface, (game.formation_x, game.formation_y))
+
+
+def draw_invaders_immediate(game):
+    """Reference version of draw_invaders() that draws every invader with primitives."""
+    for invader in game.invaders:
+        x = game.formation_x + invader.rel_x
+        y = game.formation_y + invader.rel_y
+        rect = (x, y, invader_width, invader_height)
+        pygame.draw.rect(screen, invader.color, rect)
         # Add a simple white outline
-        pygame.draw.rect(screen, WHITE, invader["rect"], 1)
+        pygame.draw.rect(screen, WHITE, rect, 1)
         # Add a small glowing circle for detail
         pygame.draw.circle(
             screen,
             LIGHT_GREEN,
-            (invader["x"] + invader["width"] // 2, invader["y"] + invader["height"] // 2),
-            invader["width"] // 4,
+            (x + invader_width // 2, y + invader_height // 2),
+            invader_width // 4,
             1,
         )
 
 
-def draw_bullets():
+def draw_bullets(game):
     """Draws player bullets."""
-    for bullet in bullets:
-        pygame.draw.rect(screen, bullet_color, (bullet["x"], bullet["y"], bullet_width, bullet_height))
+    for bullet in game.bullets:
+        pygame.draw.rect(screen, bullet_color, bullet.rect)
 
 
-def draw_invader_bullets():
+def draw_invader_bullets(game):
     """Draws invader bullets."""
-    for bullet in invader_bullets:
-        pygame.draw.rect(screen, invader_bullet_color, (bullet["x"], bullet["y"], invader_bullet_width, invader_bullet_height))
+    for bullet in game.invader_bullets:
+        pygame.draw.rect(screen, invader_bullet_color, bullet.rect)
+
 
+def display_score(game):
+    """Displays the current score."""
+    if font:
+        screen.blit(score_text.render(f"Score: {game.score}"), (10, 10))
 
-def move_bullets():
-    """Moves player bullets."""
-    for bullet in bullets:
-        bullet["y"] -= bullet_speed
-        if bullet["y"] < 0:
-            bullets.remove(bullet)
 
+def display_game_over_text(game):
+    """Displays the game over message."""
+    if font:
+        game_over_surface = game_over_text.render("GAME OVER")
+        game_over_rect = game_over_surface.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
+        screen.blit(game_over_surface, game_over_rect)
 
-def move_invader_bullets():
-    """Moves invader bullets."""
-    for bullet in invader_bullets:
-        bullet["y"] += invader_bullet_speed
-        if bullet["y"] > SCREEN_HEIGHT:
-            invader_bullets.remove(bullet)
+        score_surface = final_score_text.render(f"Final Score: {game.score}")
+        score_rect = score_surface.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20))
+        screen.blit(score_surface, score_rect)
 
+        restart_surface = restart_text.render("Press R to Restart")
+        restart_rect = restart_surface.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100))
+        screen.blit(restart_surface, restart_rect)
 
-def move_invaders():
-    """Moves the invaders grid and checks for boundaries."""
-    global invader_speed_x, invader_speed_y
-    if not invaders:
-        return
 
-    # Check boundaries and reverse
-    move_down = False
-    for invader in invaders:
-        invader["x"] += invader_speed_x
-        invader["rect"].x = invader["x"]
-        if invader["rect"].right >= SCREEN_WIDTH or invader["rect"].left <= 0:
-            move_down = True
-
-    if move_down:
-        invader_speed_x *= -1
-        for invader in invaders:
-            invader["y"] += invader_speed_y
-            invader["rect"].y = invader["y"]
-
-
-def check_collisions():
-    """Checks for collisions between bullets, invaders, and player."""
-    global score, game_over, invaders
-
-    # Player bullets vs Invaders
-    bullets_to_remove = []
-    invaders_to_remove = []
-    for bullet in bullets:
-        for invader in invaders:
-            if invader["rect"].colliderect(bullet["rect"]):
-                bullets_to_remove.append(bullet)
-                invaders_to_remove.append(invader)
-                score += 10
-                break  # Bullet hits only one invader
-
-    for bullet in bullets_to_remove:
-        if bullet in bullets:
-            bullets.remove(bullet)
-    for invader in invaders_to_remove:
-        if invader in invaders:
-            invaders.remove(invader)
-
-    # Invader bullets vs Player
-    invader_bullets_to_remove = []
-    for bullet in invader_bullets:
-        player_rect = pygame.Rect(player_x, player_y, player_width, player_height)
-        if player_rect.colliderect(bullet["rect"]):
-            invader_bullets_to_remove.append(bullet)
-            game_over = True
-            break
+def benchmark_collisions(rows=50, cols=100, bullets_per_frame=500, frames=20, seed=0):
+    """Times grid-indexed and brute-force bullet checks on a large formation under a heavy bullet stream."""
+    game = Game(rows, cols)
+    game.bullets = Pool([Bullet(bullet_width, bullet_height) for _ in range(bullets_per_frame)])
+
+    print(f"{rows}x{cols} formation, {bullets_per_frame} bullets per frame, {frames} frames")
+    print(f"{'method':>12} {'ms/frame':>10} {'hits':>7}")
+    for name, check in (("brute force", game.check_bullet_hits_brute_force), ("grid", game.check_bullet_hits)):
+        rng = random.Random(seed)
+        game.create_invaders()
+        elapsed = 0.0
+        hits = 0
+        for _ in range(frames):
+            game.bullets.clear()
+            for _ in range(bullets_per_frame):
+                x = rng.randrange(game.formation_x, game.formation_x + cols * invader_pitch_x)
+                y = rng.randrange(game.formation_y, game.formation_y + rows * invader_pitch_y)
+                game.bullets.acquire().place(x, y)
+            start = time.perf_counter()
+            hits += check()
+            elapsed += time.perf_counter() - start
+        print(f"{name:>12} {elapsed * 1000 / frames:>10.2f} {hits:>7}")
+
+
+def benchmark_shooters(formations=((5, 8), (12, 15), (50, 100)), picks=20000, seed=0):
+    """Times choosing an invader shooter on half-destroyed formations: any invader, grid scan and front-line index."""
+    print(f"{'formation':>10} {'selection':>10} {'us/shot':>10}")
+    for rows, cols in formations:
+        game = Game(rows, cols)
+        for name, pick in (
+            ("any", lambda: game.invaders.items[game.rng.randrange(game.invaders.count)]),
+            ("scan", game.pick_shooter_scan),
+            ("indexed", game.pick_shooter),
+        ):
+            game.rng = random.Random(seed)
+            game.create_invaders()
+            while game.invaders.count > rows * cols // 2:
+                game.destroy_invader(game.invaders.items[game.rng.randrange(game.invaders.count)])
+            start = time.perf_counter()
+            for _ in range(picks):
+                pick()
+            elapsed = time.perf_counter() - start
+            print(f"{rows:>4}x{cols:<5} {name:>10} {elapsed * 1e6 / picks:>10.3f}")
+
+
+def benchmark_render(formations=((5, 8), (12, 15), (50, 100)), frames=120, seed=0):
+    """Times drawing the formation and score with primitives against the cached atlas and text."""
+    init_display()
+    print(f"{'formation':>10} {'renderer':>10} {'ms/frame':>10}")
+    for rows, cols in formations:
+        game = Game(rows, cols)
+        for name, draw in (("immediate", draw_invaders_immediate), ("cached", draw_invaders)):
+            rng = random.Random(seed)
+            game.create_invaders()
+            elapsed = 0.0
+            for frame in range(frames):
+                # Lose an invader every few frames so the cached path pays for its erases
+                if frame % 4 == 0 and game.invaders:
+                    game.destroy_invader(game.invaders.items[rng.randrange(game.invaders.count)])
+                    game.score += 10
+                start = time.perf_counter()
+                screen.fill(BLACK)
+                draw(game)
+                if draw is draw_invaders:
+                    display_score(game)
+                elif font:
+                    screen.blit(font.render(f"Score: {game.score}", True, WHITE), (10, 10))
+                elapsed += time.perf_counter() - start
+            print(f"{rows:>4}x{cols:<5} {name:>10} {elapsed * 1000 / frames:>10.3f}")
+
 
-    for bullet in invader_bullets_to_remove:
-        if bullet in invader_bullets:
-            invader_bullets.remove(bullet)
+def draw_game(game):
+    """Draws the current frame to the screen."""
+    draw_sprites(game)
+    draw_text(game)
 
-    # Check if invaders reached the bottom
-    for invader in invaders:
-        if invader["rect"].bottom >= player_y:
-            game_over = True
+
+def draw_sprites(game):
+    """Clears the screen and draws the player, invaders and bullets."""
+    # Clear the screen
+    screen.fill(BLACK)  # Use a dark background
+
+    # Draw game elements
+    draw_player(game)
+    draw_invaders(game)
+    draw_bullets(game)
+    draw_invader_bullets(game)
+
+
+def draw_text(game):
+    """Draws the score and, once the game is over, the game over message."""
+    display_score(game)
+
+    if game.game_over:
+        display_game_over_text(game)
+
+
+class SpaceInvadersEnv:
+    """One game driven programmatically: reset(seed), then step(action) once per frame.
+
+    action is a bitmask of ACTION_LEFT, ACTION_RIGHT and ACTION_FIRE. step() returns
+    (observation, reward, done) where reward is the score gained that frame. Episodes end
+    when the player is hit, the formation lands or is cleared, or after max_steps frames.
+    Pass render=True to draw every step to the window.
+    """
+
+    def __init__(self, render=False, max_steps=MAX_EPISODE_STEPS):
+        self.render = render
+        self.max_steps = max_steps
+        if render:
+            init_display()
+        self.steps = 0
+        self.game = Game()
+
+    def reset(self, seed=None):
+        self.game.rng = random.Random(seed)
+        self.game.reset()
+        self.steps = 0
+        return self.game.observe()
+
+    def step(self, action):
+        game = self.game
+        previous_score = game.score
+        game.step(action & ACTION_LEFT, action & ACTION_RIGHT, action & ACTION_FIRE)
+        self.steps += 1
+        if self.render:
+            draw_game(game)
+            pygame.display.flip()
+        done = game.game_over or not game.invaders or self.steps >= self.max_steps
+        return game.observe(), game.score - previous_score, done
+
+
+def tracking_policy(observation):
+    """Simple bot: steer under the formation's middle column and keep firing."""
+    formation_x = observation["formation"][0]
+    target = formation_x + (invader_cols * invader_pitch_x) // 2 - player_width // 2
+    player_x = observation["player_x"]
+    action = ACTION_FIRE
+    if player_x < target - player_speed:
+        action |= ACTION_RIGHT
+    elif player_x > target + player_speed:
+        action |= ACTION_LEFT
+    return action
+
+
+class EnvChunk:
+    """A run of consecutive games from a batch that resets finished episodes itself.
+
+    Game i of a batch of n plays seeds seed + i, seed + i + n, seed + i + 2n, ... so every
+    episode in the batch gets a distinct seed no matter how the games are split up.
+    """
+
+    def __init__(self, first, count, num_envs, seed, max_steps):
+        self.envs = [SpaceInvadersEnv(max_steps=max_steps) for _ in range(count)]
+        self.seeds = [seed + first + i for i in range(count)]
+        self.stride = num_envs
+        self.observations = [env.reset(env_seed) for env, env_seed in zip(self.envs, self.seeds)]
+
+    def step(self, actions):
+        """Steps every game once and returns (results, final scores of episodes that ended)."""
+        results = []
+        finished = []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            observation, reward, done = env.step(action)
+            if done:
+                finished.append(observation["score"])
+                self.seeds[i] += self.stride
+                observation = env.reset(self.seeds[i])
+            results.append((observation, reward, done))
+        return results, finished
+
+
+def _run_env_chunk(connection, first, count, num_envs, seed, max_steps):
+    """Worker process loop for BatchedSpaceInvaders."""
+    chunk = EnvChunk(first, count, num_envs, seed, max_steps)
+    connection.send(chunk.observations)
+    while True:
+        actions = connection.recv()
+        if actions is None:
             break
+        connection.send(chunk.step(actions))
+    connection.close()
 
 
-def invader_shoot():
-    """Randomly makes an invader shoot a bullet."""
-    global invader_bullets
-    if not invaders:
-        return
+class BatchedSpaceInvaders:
+    """Steps num_envs independent games in lockstep, split across worker processes.
+
+    step(actions) takes one action per game and returns one (observation, reward, done) per
+    game. Finished games restart immediately, so the observation returned with done=True is
+    the first of the next episode; final scores are appended to finished_scores.
+    """
+
+    def __init__(self, num_envs, workers=None, seed=0, max_steps=MAX_EPISODE_STEPS):
+        if num_envs < 1:
+            raise ValueError(f"num_envs must be at least 1, got {num_envs}")
+        workers = max(1, min(workers or os.cpu_count() or 1, num_envs))
+        self.num_envs = num_envs
+        self.finished_scores = []
+        self.chunk = None
+        self.connections = []
+        self.processes = []
+        if workers == 1:
+            self.chunk = EnvChunk(0, num_envs, num_envs, seed, max_steps)
+            self.observations = self.chunk.observations
+            return
+
+        # Imported here because it costs more than the rest of the module to load
+        import multiprocessing
+
+        # Contiguous chunks so results come back in game order
+        self.observations = []
+        first = 0
+        for i in range(workers):
+            count = num_envs // workers + (i < num_envs % workers)
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_run_env_chunk, args=(child, first, count, num_envs, seed, max_steps), daemon=True
+            )
+            process.start()
+            child.close()
+            self.connections.append((parent, first, count))
+            self.processes.append(process)
+            first += count
+        for parent, _, _ in self.connections:
+            self.observations.extend(parent.recv())
+
+    def step(self, actions):
+        if self.chunk is not None:
+            results, finished = self.chunk.step(actions)
+            self.finished_scores.extend(finished)
+        else:
+            for parent, first, count in self.connections:
+                parent.send(actions[first : first + count])
+            results = []
+            for parent, _, _ in self.connections:
+                chunk_results, finished = parent.recv()
+                results.extend(chunk_results)
+                self.finished_scores.extend(finished)
+        self.observations = [observation for observation, _, _ in results]
+        return results
+
+    def close(self):
+        for parent, _, _ in self.connections:
+            parent.send(None)
+            parent.close()
+        for process in self.processes:
+            process.join()
+
+
+def evaluate_bot(policy=None, games=200, num_envs=64, workers=None, seed=0):
+    """Plays games episodes with policy across a batch and reports throughput and scores."""
+    policy = policy or tracking_policy
+    batch = BatchedSpaceInvaders(num_envs, workers, seed)
+    steps = 0
+    start = time.perf_counter()
+    while len(batch.finished_scores) < games:
+        batch.step([policy(observation) for observation in batch.observations])
+        steps += num_envs
+    elapsed = time.perf_counter() - start
+    batch.close()
+
+    scores = batch.finished_scores[:games]
+    print(f"{len(batch.finished_scores)} games in {elapsed:.2f}s: {len(batch.finished_scores) / elapsed:.1f} games/sec")
+    print(f"{steps / elapsed:.0f} game-steps/sec, mean score {sum(scores) / len(scores):.1f}, best {max(scores)}")
+    return scores
+
+
+class InputRecorder:
+    """Collects one control bitmask per game tick and writes them with the seed on close."""
+
+    def __init__(self, path, seed):
+        # Checked up front so a bad seed fails before the session is played, not when it is saved
+        if not 0 <= seed <= MAX_SEED:
+            raise ValueError(f"seed must be between 0 and {MAX_SEED} to be recorded, got {seed}")
+        self.path = path
+        self.seed = seed
+        self.masks = bytearray()
+
+    def tick(self, mask):
+        self.masks.append(mask)
+
+    def restart(self):
+        self.masks.append(INPUT_RESTART)
+
+    def close(self, checksum):
+        with open(self.path, "wb") as file:
+            file.write(INPUT_HEADER.pack(INPUT_MAGIC, INPUT_VERSION, self.seed, len(self.masks), checksum.encode()))
+            file.write(self.masks)
+
+
+def load_inputs(path):
+    """Reads an input recording and returns (seed, masks, final-state checksum)."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < INPUT_HEADER.size:
+        raise ValueError(f"{path} is too short to be an input recording")
+    magic, version, seed, ticks, checksum = INPUT_HEADER.unpack_from(data)
+    if magic != INPUT_MAGIC or version != INPUT_VERSION:
+        raise ValueError(f"{path} is not a version {INPUT_VERSION} Space Invaders input recording")
+    masks = data[INPUT_HEADER.size : INPUT_HEADER.size + ticks]
+    if len(masks) != ticks:
+        raise ValueError(f"{path} is truncated: {len(masks)} of {ticks} ticks present")
+    return seed, masks, checksum.decode()
+
+
+def play_inputs(seed, masks, render=False):
+    """Replays masks on a fresh game seeded with seed and returns (game, ticks that ran).
+
+    Rendered playback runs at the normal tick rate and stops early if the window is closed.
+    """
+    if render:
+        init_display()
+    game = Game(rng=random.Random(seed))
+    game.reset()
+    clock = pygame.time.Clock()
+    ticks = 0
+    for mask in masks:
+        if mask & INPUT_RESTART:
+            game.reset()
+        else:
+            game.step(mask & ACTION_LEFT, mask & ACTION_RIGHT, mask & ACTION_FIRE)
+        ticks += 1
+        if render:
+            if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                break
+            draw_game(game)
+            pygame.display.flip()
+            clock.tick(FPS)
+    return game, ticks
+
+
+def replay_inputs(path, headless=False, repeat=1):
+    """Plays an input recording back and checks the final state against the recorded checksum.
+
+    Headless replays skip drawing and run as fast as possible, repeat times over, which
+    makes a recording a repeatable performance workload. Returns True when every pass ends
+    in the recorded state.
+    """
+    seed, masks, expected = load_inputs(path)
+    passes = repeat if headless else 1
+    start = time.perf_counter()
+    for _ in range(passes):
+        game, ticks = play_inputs(seed, masks, render=not headless)
+        if ticks < len(masks):
+            print(f"Replay stopped after {ticks} of {len(masks)} ticks; final state not checked")
+            return False
+        checksum = game.state_checksum()
+        if checksum != expected:
+            print(f"Final state MISMATCH: {checksum}, recorded {expected}")
+            return False
+    elapsed = time.perf_counter() - start
+
+    ticks = passes * len(masks)
+    print(f"Replayed {ticks} ticks (seed {seed}, {passes} passes) in {elapsed:.2f}s: {ticks / elapsed:.0f} ticks/sec")
+    print(f"Final state matches: {expected}")
+    return True
 
-    if random.random() < 0.01:  # 1% chance per frame (adjustable)
-        shooter_invader = random.choice(invaders)
-        invader_bullets.append(
-            {
-                "x": shooter_invader["x"] + shooter_invader["width"] // 2 - invader_bullet_width // 2,
-                "y": shooter_invader["y"] + shooter_invader["height"],
-                "width": invader_bullet_width,
-                "height": invader_bullet_height,
-                "rect": pygame.Rect(
-                    shooter_invader["x"] + shooter_invader["width"] // 2 - invader_bullet_width // 2,
-                    shooter_invader["y"] + shooter_invader["height"],
-                    invader_bullet_width,
-                    invader_bullet_height,
-                ),
-            }
+
+class FixedTimestep:
+    """Accumulator that turns variable frame times into a whole number of fixed game ticks."""
+
+    def __init__(self, step_hz=FPS, max_steps=MAX_CATCH_UP_TICKS):
+        self.step_time = 1.0 / step_hz
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def advance(self, now):
+        """Returns how many ticks are due for the time elapsed since the last call."""
+        if self.last_time is None:
+            self.last_time = now
+            return 1
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        steps = int(self.accumulator // self.step_time)
+        if steps > self.max_steps:
+            # Drop the backlog rather than falling further behind every frame
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step_time
+        return steps
+
+
+class FrameStats:
+    """Histogram of frame times with percentile and dropped-frame summaries.
+
+    Frame times go into fixed 0.5 ms buckets, with the last bucket collecting everything
+    slower, so recording a frame never allocates however long the game runs.
+    """
+
+    BUCKET_MS = 0.5
+    BUCKETS = 400
+
+    def __init__(self, target_ms=1000 / FPS):
+        self.target_ms = target_ms
+        self.counts = [0] * (self.BUCKETS + 1)
+        self.frames = 0
+        self.dropped = 0
+        self.worst_ms = 0.0
+        self.font = None
+        self.surface = None
+        self.surface_frame = 0
+
+    def record(self, frame_ms):
+        self.counts[min(int(frame_ms / self.BUCKET_MS), self.BUCKETS)] += 1
+        self.frames += 1
+        # A frame that spanned several refresh intervals dropped all but one of them
+        missed = round(frame_ms / self.target_ms) - 1
+        if missed > 0:
+            self.dropped += missed
+        if frame_ms > self.worst_ms:
+            self.worst_ms = frame_ms
+
+    def percentile(self, fraction):
+        """Returns the upper edge in ms of the bucket that reaches fraction of all frames."""
+        threshold = fraction * self.frames
+        total = 0
+        for bucket, count in enumerate(self.counts[: self.BUCKETS]):
+            total += count
+            if total and total >= threshold:
+                return min((bucket + 1) * self.BUCKET_MS, self.worst_ms)
+        return self.worst_ms
+
+    def summary(self):
+        return (
+            f"{self.frames} frames  p50 {self.percentile(0.5):.1f}  p95 {self.percentile(0.95):.1f}"
+            f"  p99 {self.percentile(0.99):.1f}  max {self.worst_ms:.1f} ms  dropped {self.dropped}"
         )
 
+    def draw(self, refresh_frames=30):
+        """Draws the summary in the bottom-left corner, re-rendering it every refresh_frames frames."""
+        if self.font is None:
+            self.font = pygame.font.Font(None, 24)
+        if self.surface is None or self.frames - self.surface_frame >= refresh_frames:
+            self.surface = self.font.render(self.summary(), True, WHITE)
+            self.surface_frame = self.frames
+        screen.blit(self.surface, (10, SCREEN_HEIGHT - 20))
 
-def display_score():
-    """Displays the current score."""
-    if font:
-        score_text = font.render(f"Score: {score}", True, WHITE)
-        screen.blit(score_text, (10, 10))
 
+# Run in a fresh interpreter by benchmark_startup(); prints seconds to import and to first frame
+STARTUP_PROBE = """
+import importlib.util, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("space_invaders", sys.argv[1])
+space_invaders = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(space_invaders)
+imported = time.perf_counter()
+space_invaders.init_display()
+game = space_invaders.Game()
+game.reset()
+space_invaders.draw_game(game)
+space_invaders.pygame.display.flip()
+print(imported - start, time.perf_counter() - start)
+"""
 
-def display_game_over_text():
-    """Displays the game over message."""
-    if font:
-        game_over_text = font.render("GAME OVER", True, RED)
-        game_over_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
-        screen.blit(game_over_text, game_over_rect)
-
-        score_text = font.render(f"Final Score: {score}", True, WHITE)
-        score_rect = score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20))
-        screen.blit(score_text, score_rect)
-
-        restart_text = font.render("Press R to Restart", True, YELLOW)
-        restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100))
-        screen.blit(restart_text, restart_rect)
-
-
-# Game loop
-create_invaders()
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_SPACE and not game_over:
-                bullets.append(
-                    {
-                        "x": player_x + player_width // 2 - bullet_width // 2,
-                        "y": player_y,
-                        "width": bullet_width,
-                        "height": bullet_height,
-                        "rect": pygame.Rect(
-                            player_x + player_width // 2 - bullet_width // 2, player_y, bullet_width, bullet_height
-                        ),
-                    }
-                )
-            if event.key == pygame.K_r and game_over:
-                game_over = False
-                score = 0
-                bullets = []
-                invader_bullets = []
-                create_invaders()
-                player_x = SCREEN_WIDTH // 2 - player_width // 2
-
-    if not game_over:
-        # Player movement
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT] and player_x > 0:
-            player_x -= player_speed
-        if keys[pygame.K_RIGHT] and player_x < SCREEN_WIDTH - player_width:
-            player_x += player_speed
 
-        # Move bullets
-        move_bullets()
-        move_invader_bullets()
+def benchmark_startup(runs=5):
+    """Measures cold import time and time to first frame, each in a new interpreter."""
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE, os.path.abspath(__file__)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results.append([float(value) * 1000 for value in output.split()[-2:]])
+    imports, first_frames = zip(*results)
+    print(f"{runs} cold starts (best / median)")
+    print(f"import:      {min(imports):7.1f} / {sorted(imports)[runs // 2]:7.1f} ms")
+    print(f"first frame: {min(first_frames):7.1f} / {sorted(first_frames)[runs // 2]:7.1f} ms")
 
-        # Move invaders
-        move_invaders()
 
-        # Invader shooting
-        invader_shoot()
+# Subsystems that MemoryTelemetry attributes allocations to
+MEMORY_INPUT = 0
+MEMORY_ENTITIES = 1
+MEMORY_RENDERING = 2
+MEMORY_TEXT = 3
+MEMORY_SUBSYSTEMS = ("input", "entities", "rendering", "text")
 
-        # Check collisions
-        check_collisions()
 
-    # Clear the screen
-    screen.fill(BLACK)  # Use a dark background
+class MemoryTelemetry:
+    """Opt-in allocation and garbage collector telemetry for the game loop.
 
-    # Draw game elements
-    draw_player()
-    draw_invaders()
-    draw_bullets()
-    draw_invader_bullets()
-    display_score()
+    Call subsystem() as the loop moves from input to game logic to drawing to text and
+    end_frame() after each frame. Allocation is measured with tracemalloc as the peak of Python-heap
+    bytes a subsystem reached above its starting level, so memory freed and reused within
+    one subsystem counts once; SDL surface pixels are not traced. A gc callback times
+    every collection and charges the pause to the frame it happened in.
+    """
+
+    def __init__(self):
+        count = len(MEMORY_SUBSYSTEMS)
+        self.frame_bytes = [0] * count
+        self.total_bytes = [0] * count
+        self.max_bytes = [0] * count
+        self.frames = 0
+        self.current = -1
+        self.base = 0
+        self.gc_started = 0.0
+        self.frame_pause = 0.0
+        self.total_pause = 0.0
+        self.max_pause = 0.0
+        self.paused_frames = 0
+        self.collections = [0, 0, 0]
+        self.font = None
+        self.surface = None
+        self.surface_frame = 0
+
+        tracemalloc.start()
+        self.start_snapshot = self.snapshot()
+        self.start_bytes = tracemalloc.get_traced_memory()[0]
+        gc.callbacks.append(self.on_gc)
+
+    @staticmethod
+    def snapshot():
+        """Takes a snapshot without tracemalloc's own bookkeeping."""
+        return tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_started = time.perf_counter()
+        else:
+            self.frame_pause += time.perf_counter() - self.gc_started
+            self.collections[info["generation"]] += 1
+
+    def subsystem(self, index):
+        """Closes the current subsystem's measurement and starts one for index."""
+        current, peak = tracemalloc.get_traced_memory()
+        if self.current >= 0:
+            self.frame_bytes[self.current] += peak - self.base
+        tracemalloc.reset_peak()
+        self.base = current
+        self.current = index
+
+    def end_frame(self):
+        self.subsystem(-1)
+        for index, allocated in enumerate(self.frame_bytes):
+            self.total_bytes[index] += allocated
+            if allocated > self.max_bytes[index]:
+                self.max_bytes[index] = allocated
+            self.frame_bytes[index] = 0
+        self.frames += 1
+        if self.frame_pause:
+            self.paused_frames += 1
+            self.total_pause += self.frame_pause
+            if self.frame_pause > self.max_pause:
+                self.max_pause = self.frame_pause
+            self.frame_pause = 0.0
+
+    def overlay_text(self):
+        frames = self.frames or 1
+        allocated = "  ".join(
+            f"{name} {total / frames / 1024:.1f}" for name, total in zip(MEMORY_SUBSYSTEMS, self.total_bytes)
+        )
+        return f"KB/frame: {allocated}  gc {sum(self.collections)} ({self.total_pause * 1000:.1f} ms)"
+
+    def draw(self, refresh_frames=30):
+        """Draws running averages above the frame-time overlay, re-rendering every refresh_frames frames."""
+        if self.font is None:
+            self.font = pygame.font.Font(None, 24)
+        if self.surface is None or self.frames - self.surface_frame >= refresh_frames:
+            self.surface = self.font.render(self.overlay_text(), True, WHITE)
+            self.surface_frame = self.frames
+        screen.blit(self.surface, (10, SCREEN_HEIGHT - 40))
+
+    def close(self, top=5):
+        """Stops tracing and prints per-subsystem, gc and top growth summaries."""
+        gc.callbacks.remove(self.on_gc)
+        snapshot = self.snapshot()
+        retained = tracemalloc.get_traced_memory()[0] - self.start_bytes
+        tracemalloc.stop()
+
+        frames = self.frames or 1
+        print(f"Memory over {self.frames} frames (bytes allocated per frame, mean / max):")
+        for name, total, most in zip(MEMORY_SUBSYSTEMS, self.total_bytes, self.max_bytes):
+            print(f"{name:>12} {total / frames:>10.0f} / {most}")
+        print(f"Retained since start: {retained / 1024:+.1f} KB")
+        print(
+            f"GC: {self.collections[0]}/{self.collections[1]}/{self.collections[2]} collections by generation, "
+            f"{self.total_pause * 1000:.2f} ms total, {self.max_pause * 1000:.2f} ms worst, "
+            f"{self.paused_frames} frames paused"
+        )
+        print("Largest growth by line:")
+        for stat in snapshot.compare_to(self.start_snapshot, "lineno")[:top]:
+            print(f"  {stat}")
+
+
+def main(show_frame_stats=False, seed=None, record_path=None, track_memory=False):
+    """Runs the game loop, recording every tick's controls to record_path if given."""
+    global running
+
+    init_display()
+    # A recording replays only from its seed, so pick one up front when none is given
+    if seed is None:
+        seed = random.randrange(2**32)
+    game = Game(rng=random.Random(seed))
+    recorder = InputRecorder(record_path, seed) if record_path else None
+
+    # F3 toggles the frame-time overlay
+    clock = pygame.time.Clock()
+    timestep = FixedTimestep()
+    frame_stats = FrameStats()
+    last_frame = time.perf_counter()
+
+    game.reset()
+    # Started last so setup does not count against the first frame
+    memory = MemoryTelemetry() if track_memory else None
+    fire = False
+    while running:
+        if memory:
+            memory.subsystem(MEMORY_INPUT)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE and not game.game_over:
+                    fire = True
+                if event.key == pygame.K_r and game.game_over:
+                    game.reset()
+                    if recorder:
+                        recorder.restart()
+                if event.key == pygame.K_F3:
+                    show_frame_stats = not show_frame_stats
+
+        now = time.perf_counter()
+        frame_stats.record((now - last_frame) * 1000)
+        last_frame = now
+
+        # Run as many fixed ticks as real time calls for, so speed does not depend on the frame rate
+        keys = pygame.key.get_pressed()
+        controls = (keys[pygame.K_LEFT] and ACTION_LEFT) | (keys[pygame.K_RIGHT] and ACTION_RIGHT)
+        if memory:
+            memory.subsystem(MEMORY_ENTITIES)
+        for _ in range(timestep.advance(now)):
+            if game.game_over:
+                break
+            mask = controls | (fire and ACTION_FIRE)
+            game.step(mask & ACTION_LEFT, mask & ACTION_RIGHT, mask & ACTION_FIRE)
+            if recorder:
+                recorder.tick(mask)
+            fire = False
+
+        if memory:
+            memory.subsystem(MEMORY_RENDERING)
+            draw_sprites(game)
+            memory.subsystem(MEMORY_TEXT)
+            draw_text(game)
+            memory.end_frame()
+            memory.draw()
+        else:
+            draw_game(game)
+        if show_frame_stats:
+            frame_stats.draw()
+
+        # Update the display
+        pygame.display.flip()
+
+        # Control frame rate
+        clock.tick(FPS)
 
-    if game_over:
-        display_game_over_text()
+    print(f"Frame times: {frame_stats.summary()}")
+    if memory:
+        memory.close()
+    if recorder:
+        recorder.close(game.state_checksum())
+        print(f"Recorded {len(recorder.masks)} ticks (seed {seed}) to {record_path}")
+    # Quit Pygame
+    pygame.quit()
 
-    # Update the display
-    pygame.display.flip()
 
-    # Control frame rate
-    pygame.time.Clock().tick(60)  # 60 frames per second
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Modern Space Invaders")
+    parser.add_argument("--bench-collisions", action="store_true", help="compare bullet collision checks and shooter selection and exit")
+    parser.add_argument("--bench-render", action="store_true", help="compare cached and immediate drawing and exit")
+    parser.add_argument("--bench-startup", action="store_true", help="time cold import and first frame and exit")
+    parser.add_argument("--evaluate", action="store_true", help="play headless games with the built-in bot and exit")
+    parser.add_argument("--games", type=int, default=200, help="episodes to play for --evaluate")
+    parser.add_argument("--envs", type=int, default=64, help="games stepped in lockstep for --evaluate")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --evaluate (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None, help="game seed (default: random; first seed 0 for --evaluate)")
+    parser.add_argument("--frame-stats", action="store_true", help="start with the frame-time overlay shown (F3)")
+    parser.add_argument("--memory", action="store_true", help="trace allocations and gc pauses per frame")
+    parser.add_argument("--record", metavar="PATH", help="record the seed and every tick's controls to PATH")
+    parser.add_argument("--replay", metavar="PATH", help="play back an input recording and check its final state")
+    parser.add_argument("--headless", action="store_true", help="run --replay at full speed without drawing")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the recording for --replay --headless")
+    args = parser.parse_args()
+    if args.seed is not None and not 0 <= args.seed <= MAX_SEED:
+        parser.error(f"--seed must be between 0 and {MAX_SEED}")
+    if args.evaluate and args.envs < 1:
+        parser.error("--envs must be at least 1")
+    if args.evaluate and args.games < 1:
+        parser.error("--games must be at least 1")
 
-# Quit Pygame
-pygame.quit()
+    if args.bench_collisions:
+        benchmark_collisions()
+        benchmark_shooters()
+    elif args.bench_render:
+        benchmark_render()
+    elif args.bench_startup:
+        benchmark_startup()
+    elif args.evaluate:
+        evaluate_bot(games=args.games, num_envs=args.envs, workers=args.workers, seed=args.seed or 0)
+    elif args.replay:
+        sys.exit(0 if replay_inputs(args.replay, args.headless, args.repeat) else 1)
+    else:
+        main(args.frame_stats, args.seed, args.record, args.memory)